@@ -1,6 +1,16 @@
-import game
+import os
+import sys
 
 
 if __name__ == '__main__':
-    g = game.Game()
-    g.run()
+    if sys.argv[1:2] == ['bench']:
+        os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+        import benchmark
+        benchmark.main(sys.argv[2:])
+    elif sys.argv[1:2] == ['pack']:
+        import assetpack
+        assetpack.main()
+    else:
+        import game
+        g = game.Game()
+        g.run()
@@ -0,0 +1,157 @@
+import json
+import mmap
+import os
+import struct
+from typing import Optional
+
+import pygame
+import constants as const
+import atlas
+
+MAGIC = b'RPGPACK1'
+HEADER = struct.Struct('<8sI')  # Magic and the length of the JSON index
+ALIGNMENT = 16  # Pixel data of every image starts at the multiple of this
+CHANNELS = 'RGBA'
+
+
+def get_native_format(surface: Optional[pygame.Surface] = None) -> str:
+    """
+    Function used to find the byte order of the pixels the display uses for the images with alpha.
+    Display has to be initialised.
+    :param surface: surface in the display format, by default one is created with convert_alpha()
+    :return: pygame.image.frombuffer format, e.g. 'BGRA'
+    """
+    if surface is None:
+        surface = pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha()
+    if surface.get_bytesize() != 4:
+        return 'RGBA'
+    # Shift of the channel / 8 is the byte index of the channel in the little endian pixel
+    order = sorted(range(4), key=lambda channel: surface.get_shifts()[channel])
+    if struct.pack('=I', 1)[0] == 0:  # Big endian
+        order.reverse()
+    pixel_format = ''.join(CHANNELS[channel] for channel in order)
+    return pixel_format if pixel_format in ('RGBA', 'ARGB', 'BGRA') else 'RGBA'
+
+
+def build_pack(folder: str, path: str, pixel_format: str) -> None:
+    """
+    Function used to decode all PNG files of the folder and write their pixels to a single pack file
+    :param folder: folder with the images
+    :param path: path of the pack file
+    :param pixel_format: byte order of the pixels, from get_native_format()
+    :return: None
+    """
+    file_names = sorted(name for name in os.listdir(folder) if name.lower().endswith('.png'))
+    data: list[bytes] = []
+    entries: dict[str, list[int]] = {}  # file name -> [offset from the start of the pixel data, width, height]
+    offset = 0
+    for file_name in file_names:
+        image = pygame.image.load(os.path.join(folder, file_name))
+        pixels = pygame.image.tobytes(image, pixel_format)
+        padding = -len(pixels) % ALIGNMENT
+        entries[file_name] = [offset, image.get_width(), image.get_height()]
+        data.append(pixels + bytes(padding))
+        offset += len(pixels) + padding
+    stamps = atlas.get_file_stamps(folder, file_names)
+    index = json.dumps({'format': pixel_format, 'files': stamps, 'images': entries}).encode()
+    index += b' ' * (-(HEADER.size + len(index)) % ALIGNMENT)
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, len(index)))
+        file.write(index)
+        for pixels in data:
+            file.write(pixels)
+
+
+class AssetPack:
+    """
+    Class used to read the pack file created by build_pack().
+    File is memory mapped and the Surfaces are created directly on top of the mapped pixels,
+    so loading an image doesn't decode or copy anything.
+    """
+    def __init__(self, path: str):
+        self.file = open(path, 'rb')
+        # Copy on write mapping, so drawing on the images never changes the file
+        try:
+            self.mapping: mmap.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_COPY)
+            magic, index_size = HEADER.unpack_from(self.mapping)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an asset pack")
+            index = json.loads(self.mapping[HEADER.size:HEADER.size + index_size])
+            self.pixel_format: str = index['format']
+            self.files: dict[str, list[int]] = index.get('files', {})  # Stamps of the image files the pack was built from
+            self.images: dict[str, list[int]] = index['images']
+            self.data_offset: int = HEADER.size + index_size
+            end = max((offset + width * height * 4 for offset, width, height in self.images.values()), default=0)
+            if self.data_offset + end > len(self.mapping):
+                raise ValueError(f"{path} is truncated")
+        except (ValueError, KeyError, TypeError, struct.error):
+            self.close()
+            raise
+        self.view: memoryview = memoryview(self.mapping)
+
+    def __contains__(self, file_name: str) -> bool:
+        return file_name in self.images
+
+    @classmethod
+    def open_if_usable(cls, path: str, folder: str = const.IMAGE_FOLDER) -> Optional["AssetPack"]:
+        """
+        Opens the pack if it exists, its pixels are in the format of the display
+        and none of the image files was added, removed or changed since it was built
+        :param path: path of the pack file
+        :param folder: folder with the images the pack was built from
+        :return: pack, or None if it can't be used, e.g. it is stale or corrupted
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            pack = cls(path)
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            return None
+        file_names = sorted(name for name in os.listdir(folder) if name.lower().endswith('.png'))
+        if pack.pixel_format != get_native_format() or pack.files != atlas.get_file_stamps(folder, file_names):
+            pack.close()
+            return None
+        return pack
+
+    def get_surface(self, file_name: str) -> pygame.Surface:
+        """
+        Returns the image as a Surface that uses the mapped pixels
+        :param file_name: name of the image file
+        :return: image Surface
+        """
+        offset, width, height = self.images[file_name]
+        start = self.data_offset + offset
+        return pygame.image.frombuffer(self.view[start:start + width * height * 4], (width, height), self.pixel_format)
+
+    def close(self) -> None:
+        """
+        Closes the file, Surfaces created by the pack must not be used after that
+        :return: None
+        """
+        try:
+            if hasattr(self, 'view'):
+                self.view.release()
+            if hasattr(self, 'mapping'):
+                self.mapping.close()
+        except BufferError:  # Some Surfaces still use the pixels, mapping is closed when they are deleted
+            pass
+        self.file.close()
+
+
+def main() -> None:
+    """
+    Command line entry point, writes const.ASSET_PACK_FILE in the pixel format of the display
+    :return: None
+    """
+    pygame.init()
+    try:
+        pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    except pygame.error:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        pygame.display.quit()
+        pygame.display.init()
+        pygame.display.set_mode((1, 1))
+    pixel_format = get_native_format()
+    build_pack(const.IMAGE_FOLDER, const.ASSET_PACK_FILE, pixel_format)
+    print(f"Asset pack written to {const.ASSET_PACK_FILE} in {pixel_format} format")
+    pygame.quit()
@@ -1,6 +1,14 @@
+import io
 import os
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
 import pygame
+import assetpack
+import atlas
 import constants as const
+from tracing import tracer
 
 
 # File names
@@ -8,16 +16,33 @@ BUTTON_REGULAR_IMAGE = 'Button.png'
 BUTTON_HOVERED_IMAGE = 'ButtonHovered.png'
 BUTTON_INACTIVE_IMAGE = 'ButtonInactive.png'
 
+# Names of the images and the files they are loaded from
+IMAGES: dict[str, list[str]] = {
+    "BUTTON": [BUTTON_REGULAR_IMAGE, BUTTON_HOVERED_IMAGE, BUTTON_INACTIVE_IMAGE],
+}
+# Images that are loaded at the start and never removed from the cache
+PINNED_IMAGES: tuple[str, ...] = ("BUTTON",)
 
-def load_image(image_name: str, transparent_color: pygame.Color=None, alpha: int=None) -> pygame.Surface:
+
+def decode_image(image_name: str) -> pygame.Surface:
     """
-    Function used to load the image from the disk to the pygame.Surface
+    Function used to read the image file and decode it, safe to call from the worker threads
     :param image_name: name of the file
+    :return: image Surface in the format of the file
+    """
+    with open(os.path.join(const.IMAGE_FOLDER, image_name), 'rb') as file:
+        data = file.read()
+    return pygame.image.load(io.BytesIO(data), image_name)
+
+
+def prepare_image(image: pygame.Surface, transparent_color: pygame.Color=None, alpha: int=None) -> pygame.Surface:
+    """
+    Function used to convert the decoded image to the format of the display, must be called from the main thread
+    :param image: decoded image
     :param transparent_color: transparent color of the image
     :param alpha: alpha value of the image
     :return: image Surface
     """
-    image = pygame.image.load(os.path.join(const.IMAGE_FOLDER, image_name))
     if transparent_color is not None:
         image.set_colorkey(transparent_color)
     if alpha is not None:
@@ -25,21 +50,137 @@ def load_image(image_name: str, transparent_color: pygame.Color=None, alpha: int
     return image.convert_alpha()
 
 
+def load_image(image_name: str, transparent_color: pygame.Color=None, alpha: int=None) -> pygame.Surface:
+    """
+    Function used to load the image from the disk to the pygame.Surface
+    :param image_name: name of the file
+    :param transparent_color: transparent color of the image
+    :param alpha: alpha value of the image
+    :return: image Surface
+    """
+    with tracer.span(f"load_image {image_name}"):
+        return prepare_image(decode_image(image_name), transparent_color, alpha)
+
+
+class PreloadJob:
+    """
+    Class used to follow the images that are loaded in the background by Assets.preload()
+    """
+    def __init__(self, names: list[str]):
+        self.names: list[str] = names
+        self.futures: dict[str, list[Future]] = {}  # name -> decoding of every file of the images
+        self.total: int = 0  # Number of files
+        self.loaded: int = 0  # Number of files that are decoded and converted
+
+    @property
+    def progress(self) -> float:
+        """
+        Part of the files that have been loaded, between 0 and 1
+        :return: progress of the job
+        """
+        return self.loaded / self.total if self.total else 1
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether all images have been loaded
+        :return: True if the job is finished
+        """
+        return not self.futures
+
+
 class Assets:
     """
     Class used to work with the images/sounds etc.
+    Images are loaded when they are used for the first time and kept in a cache.
+    They are taken from the asset pack or the texture atlas if those are enabled, otherwise from the image files.
+    When the cache is bigger than the budget, least recently used images that aren't pinned are removed.
     """
-    def __init__(self):
-        self.images: dict[str, list[pygame.Surface]] = {}
+    def __init__(self, budget: int = const.IMAGE_CACHE_BUDGET):
+        self.manifest: dict[str, list[str]] = {name: list(files) for name, files in IMAGES.items()}
+        self.images: OrderedDict[str, list[pygame.Surface]] = OrderedDict()  # Least recently used first
+        self.sizes: dict[str, int] = {}  # Bytes of the pixel data of the loaded images
+        self.cache_size: int = 0
+        self.budget: int = budget
+        self.pinned: set[str] = set(PINNED_IMAGES)
+        self.executor: Optional[ThreadPoolExecutor] = None  # Created by the first preload() that decodes files
+        self.jobs: list[PreloadJob] = []
+        self.atlas: Optional[atlas.TextureAtlas] = None  # Images are taken from the atlas if it is loaded
+        self.pack: Optional[assetpack.AssetPack] = None  # Images are taken from the asset pack if it is opened
+
+    def load_atlas(self) -> None:
+        """
+        Loads the texture atlas of the images folder, builds and caches it if needed.
+        Images that are in the atlas are then returned as its subsurfaces, which share the pixels with the atlas.
+        :return: None
+        """
+        with tracer.span("load_atlas"):
+            self.atlas = atlas.TextureAtlas.load_or_build(const.IMAGE_FOLDER, const.ATLAS_CACHE_FOLDER)
+        for name in list(self.images):
+            self.unload(name)
 
     def load(self) -> None:
         """
-        Loads the images from the disk
+        Loads the pinned images from the disk, other images are loaded when they are needed
         :return: None
         """
-        self.images["BUTTON"] = [load_image(BUTTON_REGULAR_IMAGE),
-                                 load_image(BUTTON_HOVERED_IMAGE),
-                                 load_image(BUTTON_INACTIVE_IMAGE)]
+        if const.USE_ASSET_PACK:
+            with tracer.span("open_asset_pack"):
+                self.pack = assetpack.AssetPack.open_if_usable(const.ASSET_PACK_FILE)
+        if const.USE_ATLAS:
+            self.load_atlas()
+        for name in self.pinned:
+            self.get_images(name)
+
+    def register(self, name: str, file_names: list[str]) -> None:
+        """
+        Adds the images to the manifest, so they can be loaded by name
+        :param name: name of the images
+        :param file_names: names of the files in the images folder
+        :return: None
+        """
+        self.manifest[name] = list(file_names)
+        self.unload(name)
+
+    def pin(self, name: str) -> None:
+        """
+        Keeps the images in the cache even when it is over the budget
+        :param name: name of the images
+        :return: None
+        """
+        self.pinned.add(name)
+
+    def unpin(self, name: str) -> None:
+        """
+        Lets the images be removed from the cache
+        :param name: name of the images
+        :return: None
+        """
+        self.pinned.discard(name)
+        self.evict()
+
+    def unload(self, name: str) -> None:
+        """
+        Removes the images from the cache
+        :param name: name of the images
+        :return: None
+        """
+        if self.images.pop(name, None) is not None:
+            self.cache_size -= self.sizes.pop(name)
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used images that aren't pinned until the cache fits the budget.
+        The most recently used images are always kept.
+        :return: None
+        """
+        if self.cache_size <= self.budget:
+            return
+        for name in list(self.images)[:-1]:
+            if name not in self.pinned:
+                self.unload(name)
+                if self.cache_size <= self.budget:
+                    return
 
     def get_image(self, name: str) -> pygame.Surface:
         """
@@ -47,12 +188,115 @@ class Assets:
         :param name: name of the image
         :return: image Surface
         """
-        return self.images[name][0]
+        return self.get_images(name)[0]
 
     def get_images(self, name: str) -> list[pygame.Surface]:
         """
-        Returns the list of images
+        Returns the list of images, loads them if they aren't in the cache
         :param name: name of the images
         :return: list of image Surface
         """
-        return self.images[name]
+        images = self.images.get(name)
+        if images is not None:
+            self.images.move_to_end(name)
+            return images
+        file_names = self.manifest[name]
+        if self.is_in_pack(file_names):
+            images = [self.pack.get_surface(file_name) for file_name in file_names]
+            self.store(name, images, 0)  # Pixels belong to the pack file mapping
+        elif self.is_in_atlas(file_names):
+            images = [self.atlas.get_subsurface(file_name) for file_name in file_names]
+            self.store(name, images, 0)  # Pixels belong to the atlas
+        else:
+            images = [load_image(file_name) for file_name in file_names]
+            self.store(name, images)
+        return images
+
+    def is_in_pack(self, file_names: list[str]) -> bool:
+        """
+        Checks whether all the images can be taken from the asset pack
+        :param file_names: names of the image files
+        :return: True if the pack is opened and has all of them
+        """
+        return self.pack is not None and all(file_name in self.pack for file_name in file_names)
+
+    def is_in_atlas(self, file_names: list[str]) -> bool:
+        """
+        Checks whether all the images can be taken from the texture atlas
+        :param file_names: names of the image files
+        :return: True if the atlas is loaded and has all of them
+        """
+        return self.atlas is not None and all(file_name in self.atlas for file_name in file_names)
+
+    def get_region(self, file_name: str) -> tuple[pygame.Surface, pygame.Rect]:
+        """
+        Returns the atlas page with the image and the area of the image on it.
+        The atlas has to be loaded first, by const.USE_ATLAS or load_atlas().
+        :param file_name: name of the image file
+        :return: page Surface and area of the image
+        """
+        if self.atlas is None:
+            raise ValueError(f"Region of {file_name} was requested, but the texture atlas isn't loaded")
+        return self.atlas.get_region(file_name)
+
+    def store(self, name: str, images: list[pygame.Surface], size: Optional[int] = None) -> None:
+        """
+        Puts the loaded images in the cache
+        :param name: name of the images
+        :param images: converted images
+        :param size: bytes the images take, by default the size of their pixel data
+        :return: None
+        """
+        self.unload(name)
+        self.images[name] = images
+        if size is None:
+            size = sum(image.get_pitch() * image.get_height() for image in images)
+        self.sizes[name] = size
+        self.cache_size += self.sizes[name]
+        self.evict()
+
+    def preload(self, names: list[str]) -> PreloadJob:
+        """
+        Starts loading the images in the background, files are read and decoded by the worker threads.
+        Images get converted and put in the cache by update() on the main thread.
+        Images in the asset pack or the texture atlas are taken from there right away, they don't need decoding.
+        Images that an earlier job is still loading aren't decoded again, the jobs share them.
+        :param names: names of the images
+        :return: job that reports the progress
+        """
+        job = PreloadJob(list(names))
+        loading = {name: futures for other in self.jobs for name, futures in other.futures.items()}
+        for name in job.names:
+            if name in self.images or name in job.futures:
+                continue
+            if name in loading:
+                job.futures[name] = loading[name]
+                job.total += len(loading[name])
+                continue
+            file_names = self.manifest[name]
+            if self.is_in_pack(file_names) or self.is_in_atlas(file_names):
+                self.get_images(name)
+                continue
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(const.ASSET_WORKERS, thread_name_prefix='assets')
+            job.futures[name] = [self.executor.submit(decode_image, file_name) for file_name in file_names]
+            job.total += len(job.futures[name])
+        if not job.done:
+            self.jobs.append(job)
+        return job
+
+    def update(self) -> None:
+        """
+        Converts the images decoded by the worker threads, should be called every frame
+        :return: None
+        """
+        for job in self.jobs:
+            for name, futures in list(job.futures.items()):
+                if not all(future.done() for future in futures):
+                    continue
+                with tracer.span(f"prepare_images {name}"):
+                    if name not in self.images:
+                        self.store(name, [prepare_image(future.result()) for future in futures])
+                job.loaded += len(futures)
+                del job.futures[name]
+        self.jobs = [job for job in self.jobs if not job.done]
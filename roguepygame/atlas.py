@@ -0,0 +1,160 @@
+import json
+import os
+from typing import Optional
+
+import pygame
+import constants as const
+
+INDEX_FILE = 'atlas.json'
+PAGE_FILE = 'atlas_{}.png'
+
+
+def pack(sizes: dict[str, tuple[int, int]], page_size: int, padding: int = 1) -> dict[str, tuple[int, pygame.Rect]]:
+    """
+    Function used to place the rectangles on as few pages as possible.
+    Uses shelf packing, rectangles are sorted by height and put in rows from left to right.
+    :param sizes: name -> (width, height) of the rectangles
+    :param page_size: width and height of a page
+    :param padding: empty pixels around every rectangle
+    :return: name -> (page index, area on the page)
+    """
+    placed: dict[str, tuple[int, pygame.Rect]] = {}
+    page, x, y, row_height = 0, 0, 0, 0
+    for name in sorted(sizes, key=lambda name: (sizes[name][1], sizes[name][0]), reverse=True):
+        width, height = sizes[name]
+        if width + padding > page_size or height + padding > page_size:
+            raise ValueError(f"Image {name} of size {width}x{height} doesn't fit the atlas page of size {page_size}")
+        if x + width + padding > page_size:
+            x, y, row_height = 0, y + row_height, 0
+        if y + height + padding > page_size:
+            page, x, y, row_height = page + 1, 0, 0, 0
+        placed[name] = (page, pygame.Rect(x, y, width, height))
+        x += width + padding
+        row_height = max(row_height, height + padding)
+    return placed
+
+
+def get_file_stamps(folder: str, file_names: list[str]) -> dict[str, list[int]]:
+    """
+    Function used to find out whether the files changed since the atlas was built
+    :param folder: folder with the files
+    :param file_names: names of the files
+    :return: file name -> [modification time, size]
+    """
+    stamps = {}
+    for file_name in file_names:
+        stat = os.stat(os.path.join(folder, file_name))
+        stamps[file_name] = [stat.st_mtime_ns, stat.st_size]
+    return stamps
+
+
+class TextureAtlas:
+    """
+    Class used to keep many images on a few large Surfaces (pages).
+    Every image is a region of a page, it can be used as a subsurface that shares the pixels with the page,
+    or blitted from the page with the area argument.
+    """
+    def __init__(self, pages: list[pygame.Surface], regions: dict[str, tuple[int, pygame.Rect]]):
+        self.pages: list[pygame.Surface] = pages
+        self.regions: dict[str, tuple[int, pygame.Rect]] = regions  # file name -> (page index, area)
+
+    def __contains__(self, file_name: str) -> bool:
+        return file_name in self.regions
+
+    @classmethod
+    def build(cls, folder: str, file_names: list[str], page_size: int = const.ATLAS_PAGE_SIZE) -> "TextureAtlas":
+        """
+        Loads the images and packs them to the pages
+        :param folder: folder with the images
+        :param file_names: names of the image files
+        :param page_size: width and height of a page
+        :return: new atlas
+        """
+        images = {file_name: pygame.image.load(os.path.join(folder, file_name)) for file_name in file_names}
+        regions = pack({file_name: image.get_size() for file_name, image in images.items()}, page_size)
+        page_count = max((page for page, _ in regions.values()), default=-1) + 1
+        extents = [[0, 0] for _ in range(page_count)]  # Pages are cropped to the area that is used
+        for page, area in regions.values():
+            extents[page][0] = max(extents[page][0], area.right)
+            extents[page][1] = max(extents[page][1], area.bottom)
+        pages = [pygame.Surface(extent, pygame.SRCALPHA) for extent in extents]
+        for file_name, (page, area) in regions.items():
+            pages[page].blit(images[file_name], area)
+        return cls([page.convert_alpha() for page in pages], regions)
+
+    @classmethod
+    def load_or_build(cls, folder: str, cache_folder: str) -> "TextureAtlas":
+        """
+        Loads the atlas from the cache, or builds it from all PNG files in the folder and saves it to the cache.
+        Atlas is rebuilt when any of the files was added, removed or changed.
+        :param folder: folder with the images
+        :param cache_folder: folder where the atlas is saved
+        :return: atlas
+        """
+        file_names = sorted(name for name in os.listdir(folder) if name.lower().endswith('.png'))
+        stamps = get_file_stamps(folder, file_names)
+        atlas = cls.load(cache_folder, stamps)
+        if atlas is None:
+            atlas = cls.build(folder, file_names)
+            atlas.save(cache_folder, stamps)
+        return atlas
+
+    @classmethod
+    def load(cls, cache_folder: str, stamps: dict[str, list[int]]) -> Optional["TextureAtlas"]:
+        """
+        Loads the saved atlas
+        :param cache_folder: folder where the atlas is saved
+        :param stamps: stamps of the image files, from get_file_stamps()
+        :return: atlas, or None if it isn't saved or the images changed since it was saved
+        """
+        try:
+            with open(os.path.join(cache_folder, INDEX_FILE)) as file:
+                index = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if index.get('files') != stamps:
+            return None
+        pages = [pygame.image.load(os.path.join(cache_folder, PAGE_FILE.format(page))).convert_alpha()
+                 for page in range(index['pages'])]
+        regions = {file_name: (page, pygame.Rect(area)) for file_name, (page, area) in index['regions'].items()}
+        return cls(pages, regions)
+
+    def save(self, cache_folder: str, stamps: dict[str, list[int]]) -> None:
+        """
+        Saves the pages as PNG files and the regions to the index file
+        :param cache_folder: folder where the atlas is saved
+        :param stamps: stamps of the image files, from get_file_stamps()
+        :return: None
+        """
+        os.makedirs(cache_folder, exist_ok=True)
+        for page, surface in enumerate(self.pages):
+            pygame.image.save(surface, os.path.join(cache_folder, PAGE_FILE.format(page)))
+        index = {'files': stamps, 'pages': len(self.pages),
+                 'regions': {file_name: [page, list(area)] for file_name, (page, area) in self.regions.items()}}
+        with open(os.path.join(cache_folder, INDEX_FILE), 'w') as file:
+            json.dump(index, file)
+
+    def get_region(self, file_name: str) -> tuple[pygame.Surface, pygame.Rect]:
+        """
+        Returns the page with the image and the area of the image, use it as screen.blit(page, position, area)
+        :param file_name: name of the image file
+        :return: page Surface and area of the image
+        """
+        page, area = self.regions[file_name]
+        return self.pages[page], area
+
+    def get_subsurface(self, file_name: str) -> pygame.Surface:
+        """
+        Returns the image as the subsurface of its page, it doesn't copy the pixels
+        :param file_name: name of the image file
+        :return: image Surface
+        """
+        page, area = self.regions[file_name]
+        return self.pages[page].subsurface(area)
+
+    def get_memory(self) -> int:
+        """
+        Returns the size of the pixel data of all pages
+        :return: bytes
+        """
+        return sum(page.get_pitch() * page.get_height() for page in self.pages)
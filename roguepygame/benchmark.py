@@ -0,0 +1,464 @@
+import argparse
+import heapq
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, Optional
+
+import pygame
+import constants as const
+import root
+from tracing import tracer
+
+PHASES = ('update_state', 'events', 'update', 'render', 'flip', 'frame')  # Phases of profiler.PHASES and the frame
+
+
+def legacy_add_objects(objects: list[root.GameObject]) -> None:
+    """
+    Adds the objects the way the ObjectManager used to: append and sort the whole list on every insertion
+    :param objects: objects to add
+    :return: None
+    """
+    collection: list[root.GameObject] = []
+    for obj in objects:
+        collection.append(obj)
+        collection.sort(key=lambda x: x.layer if hasattr(x, 'layer') else 0)
+
+
+def manager_add_objects(objects: list[root.GameObject]) -> None:
+    """
+    Adds the objects to a new ObjectManager
+    :param objects: objects to add
+    :return: None
+    """
+    manager = root.ObjectManager()
+    for obj in objects:
+        manager.add_object(obj)
+
+
+def measure(function: Callable[[list[root.GameObject]], None], count: int) -> float:
+    """
+    Measures how long it takes the function to add the count of DrawableObjects
+    :param function: function that adds the objects
+    :param count: number of objects
+    :return: time in seconds
+    """
+    objects = [root.DrawableObject(layer=i % 3) for i in range(count)]
+    start = time.perf_counter()
+    function(objects)
+    return time.perf_counter() - start
+
+
+def bench_add_objects(counts: tuple[int, ...] = (1_000, 10_000, 100_000), legacy_limit: int = 20_000) -> None:
+    """
+    Compares spawning the DrawableObjects with the ObjectManager against the old sort-on-every-add behaviour.
+    Old behaviour is quadratic, so it is skipped for counts above legacy_limit.
+    :param counts: numbers of objects to spawn
+    :param legacy_limit: biggest count the old behaviour is measured for
+    :return: None
+    """
+    print(f"{'objects':>10} {'manager (s)':>12} {'legacy (s)':>12}")
+    for count in counts:
+        manager_time = measure(manager_add_objects, count)
+        legacy_time: Optional[float] = measure(legacy_add_objects, count) if count <= legacy_limit else None
+        legacy_text = f"{legacy_time:12.4f}" if legacy_time is not None else f"{'skipped':>12}"
+        print(f"{count:>10} {manager_time:12.4f} {legacy_text}")
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """
+    Returns the percentile of the sorted values
+    :param values: sorted values
+    :param fraction: percentile as the fraction between 0 and 1
+    :return: value at the percentile
+    """
+    return values[min(len(values) - 1, round(fraction * (len(values) - 1)))]
+
+
+def synthetic_events(rng: random.Random, mouse_pos: tuple[int, int]) -> list[pygame.event.Event]:
+    """
+    Creates the events of one frame, the mouse wanders around the screen
+    :param rng: random generator
+    :param mouse_pos: position of the mouse at the end of the last frame
+    :return: list of events, position of the mouse is in the last event
+    """
+    events = []
+    x, y = mouse_pos
+    for _ in range(rng.randint(0, 4)):
+        x = min(const.WIDTH - 1, max(0, x + rng.randint(-40, 40)))
+        y = min(const.HEIGHT - 1, max(0, y + rng.randint(-40, 40)))
+        events.append(pygame.event.Event(pygame.MOUSEMOTION, pos=(x, y), rel=(0, 0), buttons=(0, 0, 0)))
+    return events
+
+
+def bench_scene(scene_name: str = 'GameScene', frames: int = 1000, sprites: int = 0, seed: int = 0) -> dict:
+    """
+    Runs the scene headless, without the frame rate cap, and measures the time of the game loop phases.
+    Frames are run by Game.step(), the same as in the game, with the profiler measuring the phases.
+    Game runs in the fixed timestep mode with one step of 1 / const.FPS per frame,
+    so runs with the same arguments do the same work and the timers follow the simulated time.
+    :param scene_name: name of the Scene class in the scenes module
+    :param frames: number of frames to run
+    :param sprites: number of static DrawableObjects added to the scene
+    :param seed: seed of the synthetic events and sprite positions
+    :return: JSON serializable results
+    """
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import game
+    import profiler
+    import scenes
+
+    program = game.Game(getattr(scenes, scene_name), fixed_timestep=True)
+    program.tick_rate = const.FPS
+    rng = random.Random(seed)
+    image = pygame.Surface((16, 16))
+    image.fill("RED")
+    for _ in range(sprites):
+        rect = image.get_rect(topleft=(rng.randrange(const.WIDTH), rng.randrange(const.HEIGHT)))
+        root.DrawableObject(image, rect).add_object()
+
+    times: dict[str, list[float]] = {phase: [] for phase in PHASES}
+    mouse_pos = (const.WIDTH // 2, const.HEIGHT // 2)
+    for _ in range(frames):
+        events = synthetic_events(rng, mouse_pos)
+        if events:
+            mouse_pos = events[-1].pos
+        pygame.event.pump()
+        program.frame_time = 1 / const.FPS
+        program.step(events, mouse_pos)
+        durations = program.profiler.get_last_frame()
+        for phase, duration in zip(profiler.PHASES, durations):
+            times[phase].append(duration / 1_000_000)
+        times['frame'].append(sum(durations) / 1_000_000)
+
+    results = {'scene': scene_name, 'frames': frames, 'sprites': sprites, 'seed': seed,
+               'objects': program.get_object_manager().object_count, 'phases': {}}
+    for phase, values in times.items():
+        values.sort()
+        results['phases'][phase] = {
+            'mean_ms': sum(values) / len(values),
+            'p50_ms': percentile(values, 0.5),
+            'p99_ms': percentile(values, 0.99),
+            'max_ms': values[-1],
+        }
+    pygame.quit()
+    return results
+
+
+def bench_atlas_memory() -> dict:
+    """
+    Compares the memory of the images loaded as separate Surfaces with the memory of the texture atlas
+    :return: JSON serializable results
+    """
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import atlas
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    file_names = sorted(name for name in os.listdir(const.IMAGE_FOLDER) if name.lower().endswith('.png'))
+    images = [pygame.image.load(os.path.join(const.IMAGE_FOLDER, name)).convert_alpha() for name in file_names]
+    texture_atlas = atlas.TextureAtlas.build(const.IMAGE_FOLDER, file_names)
+    subsurfaces = [texture_atlas.get_subsurface(name) for name in file_names]
+    results = {
+        'images': len(file_names),
+        'separate': {'surfaces': len(images),
+                     'pixel_bytes': sum(image.get_pitch() * image.get_height() for image in images),
+                     'object_bytes': sum(sys.getsizeof(image) for image in images)},
+        'atlas': {'surfaces': len(texture_atlas.pages),
+                  'pixel_bytes': texture_atlas.get_memory(),
+                  'object_bytes': sum(sys.getsizeof(surface) for surface in texture_atlas.pages + subsurfaces)},
+    }
+    pygame.quit()
+    return results
+
+
+def bench_tilemap(size: int = 200, frames: int = 200, seed: int = 0) -> dict:
+    """
+    Compares drawing the map as a TileMap with drawing it as one DrawableObject per tile.
+    Every frame one random tile is changed.
+    :param size: width and height of the map in tiles
+    :param frames: number of frames to draw
+    :param seed: seed of the map and the changed tiles
+    :return: JSON serializable results
+    """
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import tilemap
+
+    pygame.init()
+    screen = pygame.display.set_mode(const.SCREEN_SIZE)
+    rng = random.Random(seed)
+    tile_images: list[Optional[pygame.Surface]] = [None]
+    for color in ("DARKGRAY", "BROWN", "DARKGREEN"):
+        image = pygame.Surface((const.TILE_SIZE, const.TILE_SIZE)).convert()
+        image.fill(color)
+        tile_images.append(image)
+    tiles = [rng.randrange(len(tile_images)) for _ in range(size * size)]
+    changes = [(rng.randrange(size), rng.randrange(size), rng.randrange(len(tile_images))) for _ in range(frames)]
+
+    results = {'size': size, 'frames': frames, 'seed': seed}
+    tile_map = tilemap.TileMap((size, size), tile_images, create_object=False)
+    tile_map.load(tiles)
+    start = time.perf_counter()
+    for x, y, tile_id in changes:
+        tile_map.set_tile(x, y, tile_id)
+        tile_map.render(screen)
+    results['tilemap_ms_per_frame'] = (time.perf_counter() - start) * 1000 / frames
+
+    manager = root.ObjectManager()
+    objects = []
+    for i, tile_id in enumerate(tiles):
+        rect = pygame.Rect(i % size * const.TILE_SIZE, i // size * const.TILE_SIZE, const.TILE_SIZE, const.TILE_SIZE)
+        objects.append(root.DrawableObject(tile_images[tile_id], rect, layer=0))
+        manager.add_object(objects[-1])
+    start = time.perf_counter()
+    for x, y, tile_id in changes:
+        objects[y * size + x].image = tile_images[tile_id]
+        manager.object_render(screen)
+    results['objects_ms_per_frame'] = (time.perf_counter() - start) * 1000 / frames
+    pygame.quit()
+    return results
+
+
+# Transformations of the octants for python_shadowcast()
+OCTANTS = ((1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+           (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1))
+
+
+def python_shadowcast(transparent: list[list[bool]], origin: tuple[int, int], radius: int) -> set[tuple[int, int]]:
+    """
+    Recursive shadowcasting in pure Python, the way the field of view is usually computed per object.
+    Used as the baseline of the fov benchmark.
+    :param transparent: rows of the map, True where the light passes
+    :param origin: (x, y) of the viewer
+    :param radius: radius of the field of view in tiles
+    :return: set of the visible (x, y)
+    """
+    height, width = len(transparent), len(transparent[0])
+    ox, oy = origin
+    visible = {origin}
+
+    def cast(row: int, start: float, end: float, xx: int, xy: int, yx: int, yy: int) -> None:
+        if start < end:
+            return
+        for distance in range(row, radius + 1):
+            dx, dy = -distance - 1, -distance
+            blocked, new_start = False, start
+            while dx <= 0:
+                dx += 1
+                x, y = ox + dx * xx + dy * xy, oy + dx * yx + dy * yy
+                left_slope, right_slope = (dx - 0.5) / (dy + 0.5), (dx + 0.5) / (dy - 0.5)
+                if start < right_slope:
+                    continue
+                if end > left_slope:
+                    break
+                inside = 0 <= x < width and 0 <= y < height
+                if inside and dx * dx + dy * dy <= radius * (radius + 1):
+                    visible.add((x, y))
+                opaque = not inside or not transparent[y][x]
+                if blocked:
+                    if opaque:
+                        new_start = right_slope
+                    else:
+                        blocked, start = False, new_start
+                elif opaque and distance < radius:
+                    blocked = True
+                    cast(distance + 1, start, left_slope, xx, xy, yx, yy)
+                    new_start = right_slope
+            if blocked:
+                break
+
+    for xx, xy, yx, yy in OCTANTS:
+        cast(1, 1.0, 0.0, xx, xy, yx, yy)
+    return visible
+
+
+def bench_fov(sizes: tuple[int, ...] = (100, 500), radius: int = const.FOV_RADIUS, viewers: int = 200,
+              walls: float = 0.3, seed: int = 0) -> dict:
+    """
+    Compares the field of view in pure Python with the NumPy module fov on the maps with randomly placed walls
+    :param sizes: widths and heights of the maps in tiles
+    :param radius: radius of the field of view in tiles
+    :param viewers: number of viewers, e.g. monsters, of the batch calculation
+    :param walls: fraction of the tiles that are walls
+    :param seed: seed of the maps and the viewers
+    :return: JSON serializable results
+    """
+    import numpy as np
+    import fov
+
+    def per_call(function: Callable[[], object], calls: int) -> float:
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        return (time.perf_counter() - start) * 1000 / calls
+
+    rng = np.random.default_rng(seed)
+    results = {'radius': radius, 'viewers': viewers, 'walls': walls, 'seed': seed, 'maps': {}}
+    for size in sizes:
+        transparent = rng.random((size, size)) >= walls
+        origins = [(int(x), int(y)) for x, y in rng.integers(size, size=(viewers, 2))]
+        rows = transparent.tolist()
+        moves = itertools.cycle(origins)  # The moving field of view is updated more times than there are viewers
+        field_of_view = fov.FieldOfView(transparent, radius)
+        python_batch_ms = per_call(lambda: [python_shadowcast(rows, origin, radius) for origin in origins], 1)
+        results['maps'][f'{size}x{size}'] = {
+            'python_ms': python_batch_ms / viewers,
+            'compute_fov_ms': per_call(lambda: fov.compute_fov(transparent, origins[0], radius), 100),
+            'field_of_view_moving_ms': per_call(lambda: field_of_view.update(next(moves)), 1000),
+            'field_of_view_unchanged_ms': per_call(lambda: field_of_view.update(origins[0]), 1000),
+            'python_batch_ms': python_batch_ms,
+            'numpy_batch_ms': per_call(lambda: fov.compute_fov_batch(transparent, origins, radius), 10),
+        }
+    return results
+
+
+def python_a_star(passable: list[list[bool]], start: tuple[int, int],
+                  goal: tuple[int, int]) -> Optional[tuple[int, int]]:
+    """
+    A* with 8 directions in pure Python, the way every monster would look for its path on its own.
+    Used as the baseline of the path benchmark.
+    :param passable: rows of the map, True where the monster can walk
+    :param start: (x, y) of the monster
+    :param goal: (x, y) of the goal
+    :return: (x, y) of the first step, None if there is no path or the monster is at the goal
+    """
+    height, width = len(passable), len(passable[0])
+    came_from: dict[tuple[int, int], tuple[int, int]] = {}
+    costs = {start: 0}
+    queue = [(0, start)]
+    while queue:
+        _, current = heapq.heappop(queue)
+        if current == goal:
+            while came_from.get(current) is not None and came_from[current] != start:
+                current = came_from[current]
+            return current if current != start else None
+        x, y = current
+        for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1)):
+            neighbour = (x + dx, y + dy)
+            if 0 <= neighbour[0] < width and 0 <= neighbour[1] < height and passable[neighbour[1]][neighbour[0]]:
+                cost = costs[current] + 1
+                if cost < costs.get(neighbour, cost + 1):
+                    costs[neighbour] = cost
+                    came_from[neighbour] = current
+                    distance = max(abs(goal[0] - neighbour[0]), abs(goal[1] - neighbour[1]))
+                    heapq.heappush(queue, (cost + distance, neighbour))
+    return None
+
+
+def bench_path(sizes: tuple[int, ...] = (100, 500), monsters: int = 200, walls: float = 0.3, seed: int = 0) -> dict:
+    """
+    Compares every monster running its own A* with all monsters using one Dijkstra map of the module pathfinding
+    :param sizes: widths and heights of the maps in tiles
+    :param monsters: number of monsters walking to the player
+    :param walls: fraction of the tiles that are walls
+    :param seed: seed of the maps and the positions
+    :return: JSON serializable results
+    """
+    import numpy as np
+    import pathfinding
+
+    rng = np.random.default_rng(seed)
+    results = {'monsters': monsters, 'walls': walls, 'seed': seed, 'maps': {}}
+    for size in sizes:
+        passable = rng.random((size, size)) >= walls
+        free = np.argwhere(passable)[:, ::-1]
+        player, *positions = [tuple(int(value) for value in free[i])
+                              for i in rng.choice(len(free), monsters + 1, replace=False)]
+        rows = passable.tolist()
+        start = time.perf_counter()
+        for position in positions:
+            python_a_star(rows, position, player)
+        a_star_ms = (time.perf_counter() - start) * 1000
+
+        pathfinder = pathfinding.Pathfinder(passable)
+        start = time.perf_counter()
+        pathfinder.next_steps(np.array(positions), [player])
+        first_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for _ in range(100):
+            pathfinder.next_steps(np.array(positions), [player])
+        cached_ms = (time.perf_counter() - start) * 10
+        walls_left = rng.permutation(np.argwhere(~passable)[:, ::-1])
+        start = time.perf_counter()
+        for x, y in walls_left[:100]:
+            pathfinder.set_cost(int(x), int(y), 1)  # A wall is dug out
+            pathfinder.next_steps(np.array(positions), [player])
+        repaired_ms = (time.perf_counter() - start) * 10
+        results['maps'][f'{size}x{size}'] = {
+            'a_star_all_monsters_ms': a_star_ms,
+            'dijkstra_map_first_ms': first_ms,
+            'dijkstra_map_cached_ms': cached_ms,
+            'dijkstra_map_after_dig_ms': repaired_ms,
+        }
+    return results
+
+
+def main(argv: list[str]) -> None:
+    """
+    Command line entry point, run "python roguepygame bench --help" for the arguments
+    :param argv: command line arguments after "bench"
+    :return: None
+    """
+    parser = argparse.ArgumentParser(prog='roguepygame bench', description='Headless benchmarks of the game.')
+    subparsers = parser.add_subparsers(dest='command')
+    scene_parser = subparsers.add_parser('scene', help='measure the game loop phases of a scene (default)')
+    scene_parser.add_argument('--scene', default='GameScene', help='name of the Scene class in scenes.py')
+    scene_parser.add_argument('--frames', type=int, default=1000)
+    scene_parser.add_argument('--sprites', type=int, default=0, help='static DrawableObjects added to the scene')
+    scene_parser.add_argument('--seed', type=int, default=0)
+    scene_parser.add_argument('--output', help='file the JSON results are written to instead of stdout')
+    scene_parser.add_argument('--trace', help='file the Chrome trace of the run is written to')
+    objects_parser = subparsers.add_parser('add-objects', help='compare ObjectManager.add_object to the old sort')
+    objects_parser.add_argument('counts', type=int, nargs='*', default=[1_000, 10_000, 100_000])
+    subparsers.add_parser('atlas', help='compare the memory of separate images and the texture atlas')
+    tilemap_parser = subparsers.add_parser('tilemap', help='compare the TileMap with one DrawableObject per tile')
+    tilemap_parser.add_argument('--size', type=int, default=200, help='width and height of the map in tiles')
+    tilemap_parser.add_argument('--frames', type=int, default=200)
+    tilemap_parser.add_argument('--seed', type=int, default=0)
+    fov_parser = subparsers.add_parser('fov', help='compare the field of view in pure Python and NumPy')
+    fov_parser.add_argument('sizes', type=int, nargs='*', default=[100, 500], help='widths and heights of the maps')
+    fov_parser.add_argument('--radius', type=int, default=const.FOV_RADIUS)
+    fov_parser.add_argument('--viewers', type=int, default=200, help='viewers of the batch calculation')
+    fov_parser.add_argument('--walls', type=float, default=0.3, help='fraction of the tiles that are walls')
+    fov_parser.add_argument('--seed', type=int, default=0)
+    path_parser = subparsers.add_parser('path', help='compare A* per monster with the shared Dijkstra map')
+    path_parser.add_argument('sizes', type=int, nargs='*', default=[100, 500], help='widths and heights of the maps')
+    path_parser.add_argument('--monsters', type=int, default=200)
+    path_parser.add_argument('--walls', type=float, default=0.3, help='fraction of the tiles that are walls')
+    path_parser.add_argument('--seed', type=int, default=0)
+    commands = (['scene'], ['add-objects'], ['atlas'], ['tilemap'], ['fov'], ['path'], ['-h'], ['--help'])
+    args = parser.parse_args(argv if argv[:1] in commands else ['scene'] + argv)
+
+    if args.command == 'add-objects':
+        bench_add_objects(tuple(args.counts))
+        return
+    if args.command == 'atlas':
+        print(json.dumps(bench_atlas_memory(), indent=2))
+        return
+    if args.command == 'tilemap':
+        print(json.dumps(bench_tilemap(args.size, args.frames, args.seed), indent=2))
+        return
+    if args.command == 'fov':
+        print(json.dumps(bench_fov(tuple(args.sizes), args.radius, args.viewers, args.walls, args.seed), indent=2))
+        return
+    if args.command == 'path':
+        print(json.dumps(bench_path(tuple(args.sizes), args.monsters, args.walls, args.seed), indent=2))
+        return
+    if args.trace is not None:
+        tracer.start()
+    results = json.dumps(bench_scene(args.scene, args.frames, args.sprites, args.seed), indent=2)
+    if args.trace is not None:
+        tracer.stop()
+        tracer.write(args.trace)
+    if args.output is None:
+        print(results)
+    else:
+        with open(args.output, 'w') as file:
+            file.write(results + '\n')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,74 @@
+from typing import Optional
+
+import pygame
+import constants as const
+
+
+class Camera:
+    """
+    Class used to represent the part of the world that is shown on the screen.
+    Rects of the DrawableObjects are in world coordinates, the camera maps them to the screen coordinates.
+    Objects with screen_space set, like the UI, are always drawn at their rects and ignore the camera.
+    """
+    def __init__(self, size: tuple[int, int] = const.SCREEN_SIZE, bounds: Optional[pygame.Rect] = None):
+        self.rect: pygame.Rect = pygame.Rect((0, 0), size)  # Area of the world on the screen
+        self.bounds: Optional[pygame.Rect] = bounds  # Area of the world the camera can't leave, e.g. the level
+
+    @property
+    def offset(self) -> tuple[int, int]:
+        """
+        Vector added to the world coordinates to get the screen coordinates
+        :return: (x, y) offset
+        """
+        return -self.rect.x, -self.rect.y
+
+    def world_to_screen(self, rect: pygame.Rect) -> pygame.Rect:
+        """
+        Converts the rect from the world coordinates to the screen coordinates
+        :param rect: rect in the world
+        :return: new rect on the screen
+        """
+        return rect.move(-self.rect.x, -self.rect.y)
+
+    def screen_to_world(self, pos: tuple[int, int]) -> tuple[int, int]:
+        """
+        Converts the point on the screen, e.g. the mouse position, to the world coordinates
+        :param pos: point on the screen
+        :return: point in the world
+        """
+        return pos[0] + self.rect.x, pos[1] + self.rect.y
+
+    def move_to(self, pos: tuple[int, int]) -> None:
+        """
+        Moves the top left corner of the camera to the point of the world, keeps the camera in the bounds
+        :param pos: point in the world
+        :return: None
+        """
+        self.rect.topleft = (round(pos[0]), round(pos[1]))
+        if self.bounds is not None:
+            self.rect.clamp_ip(self.bounds)
+
+    def move(self, dx: float, dy: float) -> None:
+        """
+        Moves the camera by the vector
+        :param dx: horizontal distance in pixels
+        :param dy: vertical distance in pixels
+        :return: None
+        """
+        self.move_to((self.rect.x + dx, self.rect.y + dy))
+
+    def center_on(self, pos: tuple[int, int]) -> None:
+        """
+        Moves the camera, so the point of the world is in the middle of the screen
+        :param pos: point in the world, e.g. the center of the player
+        :return: None
+        """
+        self.move_to((pos[0] - self.rect.width // 2, pos[1] - self.rect.height // 2))
+
+    def is_visible(self, rect: pygame.Rect) -> bool:
+        """
+        Checks whether the rect in the world coordinates is at least partly on the screen
+        :param rect: rect in the world
+        :return: True if it is visible
+        """
+        return self.rect.colliderect(rect)
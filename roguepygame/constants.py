@@ -12,8 +12,36 @@ WIDTH: int = 800
 HEIGHT: int = 600
 SCREEN_SIZE: tuple[int, int] = (WIDTH, HEIGHT)
 FPS: int = 60
+TICK_RATE: int = 60  # Simulation steps per second in the fixed timestep mode
+MAX_CATCH_UP_STEPS: int = 5  # Maximum number of simulation steps per frame in the fixed timestep mode
+SPATIAL_CELL_SIZE: int = 64  # Size of the cells of the spatial index in pixels
+MAX_DIRTY_RECTS: int = 32  # Dirty render redraws the whole screen when more regions changed after merging
+CULLING_CELL_SIZE: int = 256  # Size of the cells of the spatial index of the static objects in pixels
+TILE_SIZE: int = 32  # Width and height of a map tile in pixels
+TILE_CHUNK_SIZE: int = 16  # Width and height of a pre-rendered chunk of the tile map in tiles
+FOV_RADIUS: int = 8  # Default radius of the field of view in tiles
+FOV_BATCH_CELLS: int = 1 << 20  # Maximum number of line cells gathered at once by the batch field of view
+FOG_COLOR: tuple[int, int, int] = (0, 0, 0)  # Color of the fog of war
+FOG_EXPLORED_ALPHA: int = 160  # Opacity of the fog over the explored tiles that aren't visible
+PATHFINDING_CACHE_SIZE: int = 32  # Number of Dijkstra maps kept by the Pathfinder
+PROFILER_FRAMES: int = 4096  # Number of frames kept by the profiler
+PROFILER_REFRESH_INTERVAL: int = 250  # Milliseconds between the updates of the caption and the profiler stats
+PROFILER_KEY: int = pygame.K_F3  # Key that shows or hides the profiler overlay
+COST_TRACKER_KEY: int = pygame.K_F4  # Key that starts or stops measuring the cost of the objects
+TRACE_KEY: int = pygame.K_F5  # Key that starts or stops recording the trace
+TRACE_CAPACITY: int = 1_000_000  # Maximum number of trace events recorded
+TRACE_FILE: str = 'trace.json'  # File the trace is written to when the recording stops
+POINTER_EVENTS: frozenset[int] = frozenset({pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION})
 
 FONT_NAME: str = pygame.font.get_default_font()
 FOLDER = os.path.dirname(sys.modules['__main__'].__file__)
 ASSETS_FOLDER = os.path.join(FOLDER, 'assets')
 IMAGE_FOLDER = os.path.join(ASSETS_FOLDER, 'images')
+IMAGE_CACHE_BUDGET: int = 64 * 1024 * 1024  # Bytes of the loaded images kept by Assets
+USE_ATLAS: bool = False  # Take the images from the texture atlas of the images folder
+ATLAS_PAGE_SIZE: int = 2048  # Maximum width and height of an atlas page
+ATLAS_CACHE_FOLDER = os.path.join(ASSETS_FOLDER, 'cache')
+USE_ASSET_PACK: bool = True  # Take the images from the asset pack if it exists, "python roguepygame pack" builds it
+ASSET_PACK_FILE = os.path.join(ASSETS_FOLDER, 'images.pack')
+ASSET_WORKERS: int = 4  # Threads that decode the images loaded in the background
+TEXT_CACHE_BUDGET: int = 4 * 1024 * 1024  # Bytes of the rendered texts kept by fonts.text_cache
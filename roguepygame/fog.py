@@ -0,0 +1,130 @@
+from typing import Optional
+
+import numpy as np
+import pygame
+import constants as const
+import root
+
+
+class FogOfWar(root.DrawableObject):
+    """
+    Drawable object that covers the tiles of the map the player doesn't see.
+    Tiles that were never seen are covered completely, explored tiles that aren't visible now are darkened.
+    Visible and explored masks are stored bit-packed, 8 tiles per byte.
+    The fog is kept on a Surface with one pixel per tile, only the region where the masks changed is written.
+    Part of it on the screen is scaled to the tile size once and reused until the fog or the camera changes.
+    Put it on the layer above the TileMap it covers.
+    """
+    static = True
+
+    def __init__(self, size: tuple[int, int], tile_size: int = const.TILE_SIZE, position: tuple[int, int] = (0, 0),
+                 layer: int = 1, create_object=True):
+        super().__init__(layer=layer)
+        self.width, self.height = size  # Size of the map in tiles
+        self.tile_size: int = tile_size
+        self.visible_bits: np.ndarray = np.zeros((self.height, -(-self.width // 8)), dtype=np.uint8)
+        self.explored_bits: np.ndarray = np.zeros_like(self.visible_bits)
+        self.fog: pygame.Surface = pygame.Surface(size, pygame.SRCALPHA)  # One pixel per tile
+        self.fog.fill((*const.FOG_COLOR, 255))
+        self.rect = pygame.Rect(position, (self.width * tile_size, self.height * tile_size))
+        self.changed: Optional[pygame.Rect] = None  # Tiles changed since the last render
+        self.cached_area: Optional[pygame.Rect] = None  # Tiles scaled to self.image
+        if create_object:
+            self.add_object()
+
+    def is_visible(self, x: int, y: int) -> bool:
+        """
+        Checks whether the tile is visible now
+        :param x: column of the tile
+        :param y: row of the tile
+        :return: True if it is visible
+        """
+        return bool(self.visible_bits[y, x >> 3] & (128 >> (x & 7)))
+
+    def is_explored(self, x: int, y: int) -> bool:
+        """
+        Checks whether the tile was ever visible
+        :param x: column of the tile
+        :param y: row of the tile
+        :return: True if it was explored
+        """
+        return bool(self.explored_bits[y, x >> 3] & (128 >> (x & 7)))
+
+    def update_visible(self, visible: np.ndarray) -> None:
+        """
+        Sets the tiles the player sees now, e.g. fov.FieldOfView.visible, visible tiles become explored.
+        Fog is written only in the rows and columns of the bytes that changed.
+        :param visible: bool array of shape (height, width)
+        :return: None
+        """
+        bits = np.packbits(visible, axis=1)
+        changed = bits ^ self.visible_bits
+        rows = np.flatnonzero(changed.any(axis=1))
+        if not len(rows):
+            return
+        columns = np.flatnonzero(changed.any(axis=0))
+        top, bottom = rows[0], rows[-1] + 1
+        first, last = columns[0], columns[-1] + 1  # Bytes
+        self.visible_bits = bits
+        self.explored_bits |= bits
+        left, right = first * 8, min(self.width, last * 8)
+        region_visible = np.unpackbits(bits[top:bottom, first:last], axis=1)[:, :right - left]
+        region_explored = np.unpackbits(self.explored_bits[top:bottom, first:last], axis=1)[:, :right - left]
+        alpha = np.where(region_visible, 0, np.where(region_explored, const.FOG_EXPLORED_ALPHA, 255)).astype(np.uint8)
+        fog_alpha = pygame.surfarray.pixels_alpha(self.fog)
+        fog_alpha[left:right, top:bottom] = alpha.T  # Surface arrays are indexed by x first
+        del fog_alpha  # Unlocks the Surface
+        area = pygame.Rect(int(left), int(top), int(right - left), int(bottom - top))
+        self.changed = area if self.changed is None else self.changed.union(area)
+        self.mark_dirty()
+
+    def get_tile_area(self, map_rect: pygame.Rect, view: pygame.Rect) -> Optional[pygame.Rect]:
+        """
+        Returns the tiles that overlap the area of the screen
+        :param map_rect: area of the whole map on the screen
+        :param view: area of the screen
+        :return: area in tiles, None if the map isn't on the screen
+        """
+        area = map_rect.clip(view)
+        if not area:
+            return None
+        size = self.tile_size
+        left, top = (area.left - map_rect.left) // size, (area.top - map_rect.top) // size
+        right = (area.right - 1 - map_rect.left) // size + 1
+        bottom = (area.bottom - 1 - map_rect.top) // size + 1
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def scale_fog(self, area: pygame.Rect) -> None:
+        """
+        Scales the tiles of the area to the tile size and writes them to self.image
+        :param area: area in tiles, inside self.cached_area
+        :return: None
+        """
+        size = self.tile_size
+        target = self.image.subsurface(((area.left - self.cached_area.left) * size,
+                                         (area.top - self.cached_area.top) * size, area.width * size, area.height * size))
+        pygame.transform.scale(self.fog.subsurface(area), target.get_size(), target)
+
+    def render(self, screen: pygame.Surface) -> None:
+        """
+        Draws the fog inside the clip area of the screen, the scaled fog is updated only where it changed
+        :param screen: game window
+        :return: None
+        """
+        map_rect = self.get_screen_rect()
+        area = self.get_tile_area(map_rect, screen.get_clip())
+        if area is None:
+            return
+        if self.cached_area is None or not self.cached_area.contains(area):
+            # Some margin is cached, so the camera can move a bit before the fog is scaled again
+            self.cached_area = area.inflate(8, 8).clip(0, 0, self.width, self.height)
+            self.image = pygame.Surface((self.cached_area.width * self.tile_size,
+                                         self.cached_area.height * self.tile_size), pygame.SRCALPHA)
+            self.scale_fog(self.cached_area)
+        elif self.changed is not None:
+            changed = self.changed.clip(self.cached_area)
+            if changed:
+                self.scale_fog(changed)
+        self.changed = None
+        screen.blit(self.image, (map_rect.left + self.cached_area.left * self.tile_size,
+                                 map_rect.top + self.cached_area.top * self.tile_size))
@@ -0,0 +1,191 @@
+from collections import OrderedDict
+
+import pygame
+import constants as const
+
+GLYPH_SHEET_WIDTH: int = 512
+
+# Fonts shared by the whole game, (name, size, bold, italic) -> font
+fonts: dict[tuple[str, int, bool, bool], pygame.font.Font] = {}
+# Glyph atlases shared by the whole game, (font, color, antialias) -> atlas
+glyph_atlases: dict[tuple[pygame.font.Font, tuple[int, int, int, int], bool], "GlyphAtlas"] = {}
+
+
+def get_font(size: int, name: str = const.FONT_NAME, bold: bool = False, italic: bool = False) -> pygame.font.Font:
+    """
+    Function used to get the font, the font file is opened only the first time
+    :param size: size of the font
+    :param name: path of the font file
+    :param bold: whether the font is bold
+    :param italic: whether the font is italic
+    :return: Font
+    """
+    key = (name, size, bold, italic)
+    font = fonts.get(key)
+    if font is None:
+        font = fonts[key] = pygame.font.Font(name, size)
+        font.set_bold(bold)
+        font.set_italic(italic)
+    return font
+
+
+def render_text(font: pygame.font.Font, text: str, color: pygame.Color, antialias: bool = True) -> pygame.Surface:
+    """
+    Function used to render the text, texts rendered before are taken from text_cache.
+    Returned Surface is shared, it must not be drawn on.
+    :param font: Font, from get_font()
+    :param text: text to render
+    :param color: color of the text
+    :param antialias: whether the text is antialiased
+    :return: text Surface
+    """
+    return text_cache.render(font, text, color, antialias)
+
+
+def get_glyph_atlas(font: pygame.font.Font, color: pygame.Color, antialias: bool = True) -> "GlyphAtlas":
+    """
+    Function used to get the glyph atlas for the font and the color
+    :param font: Font, from get_font()
+    :param color: color of the text
+    :param antialias: whether the glyphs are antialiased
+    :return: GlyphAtlas
+    """
+    key = (font, tuple(pygame.Color(color)), antialias)
+    glyph_atlas = glyph_atlases.get(key)
+    if glyph_atlas is None:
+        glyph_atlas = glyph_atlases[key] = GlyphAtlas(font, color, antialias)
+    return glyph_atlas
+
+
+class GlyphAtlas:
+    """
+    Class used to render the text by putting together the glyphs rendered before.
+    Every character is rendered by the font only once and stored on the shared glyph sheet.
+    Kerning is not applied, so the text can be a bit wider than the one rendered by the font.
+    """
+    def __init__(self, font: pygame.font.Font, color: pygame.Color, antialias: bool = True):
+        self.font: pygame.font.Font = font
+        self.color: pygame.Color = pygame.Color(color)
+        self.antialias: bool = antialias
+        self.height: int = font.get_height()
+        self.sheet: pygame.Surface = pygame.Surface((GLYPH_SHEET_WIDTH, self.height), pygame.SRCALPHA)
+        self.glyphs: dict[str, pygame.Rect] = {}  # character -> area on the sheet
+        self.cursor: tuple[int, int] = (0, 0)  # Where the next glyph is put on the sheet
+        self.blit_sequence: list[tuple[pygame.Surface, tuple[int, int], pygame.Rect, int]] = []  # Reused by render()
+
+    def add_glyph(self, character: str) -> pygame.Rect:
+        """
+        Renders the character and puts it on the sheet, the sheet gets taller when it is full
+        :param character: single character
+        :return: area of the glyph on the sheet
+        """
+        glyph = self.font.render(character, self.antialias, self.color)
+        x, y = self.cursor
+        if x + glyph.get_width() > self.sheet.get_width():
+            x, y = 0, y + self.height
+        if y + self.height > self.sheet.get_height():
+            sheet = pygame.Surface((max(self.sheet.get_width(), glyph.get_width()), self.sheet.get_height() * 2),
+                                   pygame.SRCALPHA)
+            sheet.blit(self.sheet, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            self.sheet = sheet
+        area = pygame.Rect(x, y, glyph.get_width(), self.height)
+        # Blending with max on the transparent sheet copies the pixels including their alpha
+        self.sheet.blit(glyph, area, special_flags=pygame.BLEND_RGBA_MAX)
+        self.glyphs[character] = area
+        self.cursor = (x + area.width, y)
+        return area
+
+    def render(self, text: str) -> pygame.Surface:
+        """
+        Creates the Surface with the text
+        :param text: text to render
+        :return: text Surface
+        """
+        sequence = self.blit_sequence
+        x = 0
+        for character in text:
+            area = self.glyphs.get(character)
+            if area is None:
+                area = self.add_glyph(character)
+            sequence.append((self.sheet, (x, 0), area, pygame.BLEND_RGBA_MAX))
+            x += area.width
+        image = pygame.Surface((x, self.height), pygame.SRCALPHA)
+        image.blits(sequence, False)
+        sequence.clear()
+        return image
+
+
+class TextCache:
+    """
+    Class used to keep the rendered texts, so the text that was shown before doesn't have to be rendered again.
+    When the cache is bigger than the budget, least recently used texts are removed.
+    Use the text_cache object of this module instead of creating a new one.
+    """
+    def __init__(self, budget: int = const.TEXT_CACHE_BUDGET):
+        # (font, text, color, antialias) -> text Surface, least recently used first
+        self.surfaces: OrderedDict[tuple[pygame.font.Font, str, tuple[int, int, int, int], bool], pygame.Surface] = \
+            OrderedDict()
+        self.cache_size: int = 0  # Bytes of the pixel data of the cached texts
+        self.budget: int = budget
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def render(self, font: pygame.font.Font, text: str, color: pygame.Color, antialias: bool = True) -> pygame.Surface:
+        """
+        Returns the rendered text, renders it if it isn't in the cache
+        :param font: Font, from get_font()
+        :param text: text to render
+        :param color: color of the text
+        :param antialias: whether the text is antialiased
+        :return: text Surface
+        """
+        key = (font, text, tuple(pygame.Color(color)), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = self.surfaces[key] = font.render(text, antialias, color)
+        self.cache_size += surface.get_pitch() * surface.get_height()
+        self.evict()
+        return surface
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used texts until the cache fits the budget, the most recent text is always kept
+        :return: None
+        """
+        while self.cache_size > self.budget and len(self.surfaces) > 1:
+            _, surface = self.surfaces.popitem(last=False)
+            self.cache_size -= surface.get_pitch() * surface.get_height()
+
+    def set_budget(self, budget: int) -> None:
+        """
+        Changes the maximum size of the cache
+        :param budget: bytes of the rendered texts kept
+        :return: None
+        """
+        self.budget = budget
+        self.evict()
+
+    def clear(self) -> None:
+        """
+        Removes all texts and resets the counters
+        :return: None
+        """
+        self.surfaces.clear()
+        self.cache_size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_hit_rate(self) -> float:
+        """
+        Returns the share of the render() calls that were served from the cache
+        :return: number from 0 to 1
+        """
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0
+
+
+text_cache = TextCache()
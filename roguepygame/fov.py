@@ -0,0 +1,213 @@
+from typing import Optional, Sequence, TYPE_CHECKING
+
+import numpy as np
+import constants as const
+if TYPE_CHECKING:
+    import tilemap
+
+# Values of the padded grid
+OUTSIDE, OPAQUE, TRANSPARENT = -1, 0, 1
+# Lines are cast to these points around the center of the target, the target is visible if any of them is clear
+LINE_ENDS: tuple[tuple[float, float], ...] = ((0.45, 0), (-0.45, 0), (0, 0.45), (0, -0.45))
+
+
+class FovKernel:
+    """
+    Precomputed geometry of the field of view of one radius, shared by all calculations with that radius.
+    Holds the lines from the viewer to every cell of the circle.
+    Cell is visible when any of the lines to the points around its center passes only through transparent cells.
+    It gives nearly the same result as recursive shadowcasting, but all cells are checked at once with array operations.
+    Cells of the window around the viewer are numbered row by row, the viewer is in the middle.
+    """
+    def __init__(self, radius: int):
+        self.radius: int = radius
+        self.size: int = 2 * radius + 1  # Width and height of the window around the viewer
+        wy, wx = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+        wx, wy = wx.ravel(), wy.ravel()
+        self.window_x: np.ndarray = wx  # Offsets of all cells of the window
+        self.window_y: np.ndarray = wy
+        self.in_radius: np.ndarray = wx * wx + wy * wy <= radius * (radius + 1)  # Circle, without the spiky tips
+        self.targets: np.ndarray = np.flatnonzero(self.in_radius)  # Window cells that can be seen
+        tx, ty = wx[self.targets, None, None], wy[self.targets, None, None]
+        ex, ey = (np.array(end)[:, None] for end in zip(*LINE_ENDS))
+        # Cells strictly between the viewer and the target on every line, shape (targets, lines, steps)
+        lengths = np.maximum(np.abs(tx), np.abs(ty))
+        fractions = np.arange(1, max(radius, 2)) / np.maximum(lengths, 1)
+        line_x = np.floor((tx + ex) * fractions + 0.5).astype(np.intp)
+        line_y = np.floor((ty + ey) * fractions + 0.5).astype(np.intp)
+        valid = (fractions < 1) & ((line_x != tx) | (line_y != ty)) & ((line_x != 0) | (line_y != 0))
+        self.empty_lines: np.ndarray = ~valid.any(axis=2)  # Lines to the neighbours of the viewer have no cells
+        # Steps that aren't on the line repeat its first cell, or the viewer's own cell if the line is empty
+        first = valid.argmax(axis=2)[:, :, None]
+        self.line_x: np.ndarray = np.where(valid, line_x, np.take_along_axis(line_x * valid, first, axis=2))
+        self.line_y: np.ndarray = np.where(valid, line_y, np.take_along_axis(line_y * valid, first, axis=2))
+        self.offsets: dict[int, tuple[np.ndarray, np.ndarray]] = {}  # Grid width -> flat offsets, see get_offsets()
+
+    def get_offsets(self, width: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the offsets of the cells from the viewer in the flattened grid of the width
+        :param width: width of the padded grid
+        :return: int32 offsets of the line cells of shape (targets, lines, steps), int32 offsets of the window cells
+        """
+        offsets = self.offsets.get(width)
+        if offsets is None:
+            offsets = self.offsets[width] = ((self.line_y * width + self.line_x).astype(np.int32),
+                                             (self.window_y * width + self.window_x).astype(np.int32))
+        return offsets
+
+
+kernels: dict[int, FovKernel] = {}  # radius -> kernel
+
+
+def get_kernel(radius: int) -> FovKernel:
+    """
+    Function used to get the kernel of the radius, it is computed only the first time
+    :param radius: radius of the field of view in tiles
+    :return: FovKernel
+    """
+    kernel = kernels.get(radius)
+    if kernel is None:
+        kernel = kernels[radius] = FovKernel(radius)
+    return kernel
+
+
+def pad_grid(transparent: np.ndarray, radius: int) -> np.ndarray:
+    """
+    Function used to create the grid used by the calculations, the map is surrounded by radius cells of OUTSIDE
+    :param transparent: bool array of shape (height, width), True where the light passes
+    :param radius: radius of the field of view in tiles
+    :return: int8 array of shape (height + 2 * radius, width + 2 * radius)
+    """
+    return np.pad(transparent.astype(np.int8), radius, constant_values=OUTSIDE)
+
+
+def compute_windows(padded: np.ndarray, origins: np.ndarray, kernel: FovKernel) -> np.ndarray:
+    """
+    Function used to compute the field of view of many viewers at once.
+    Viewers are processed in chunks of at most const.FOV_BATCH_CELLS line cells, so the memory doesn't grow with them.
+    :param padded: grid from pad_grid() with the radius of the kernel
+    :param origins: int array of shape (n, 2), (x, y) of the viewers
+    :param kernel: FovKernel of the radius
+    :return: bool array of shape (n, size * size), visible cells of the window around every viewer
+    """
+    radius = kernel.radius
+    line_offsets, window_offsets = kernel.get_offsets(padded.shape[1])
+    grid = padded.ravel()
+    viewers = ((origins[:, 1] + radius) * padded.shape[1] + origins[:, 0] + radius).astype(np.int32)
+    visible = np.zeros((len(viewers), kernel.size * kernel.size), dtype=bool)
+    chunk_size = max(1, const.FOV_BATCH_CELLS // line_offsets.size)
+    for start in range(0, len(viewers), chunk_size):
+        chunk = viewers[start:start + chunk_size]
+        # Cell is visible if all cells on any of the lines to it are transparent
+        lines = grid.take(chunk[:, None, None, None] + line_offsets) == TRANSPARENT
+        clear = (lines.all(axis=3) | kernel.empty_lines).any(axis=2)
+        targets = grid.take(chunk[:, None] + window_offsets[kernel.targets])
+        visible[start:start + chunk_size, kernel.targets] = clear & (targets != OUTSIDE)
+    return visible
+
+
+def paste_window(mask: np.ndarray, window: np.ndarray, origin: tuple[int, int], radius: int) -> None:
+    """
+    Function used to copy the window around the viewer to the mask of the whole map
+    :param mask: bool array of shape (height, width)
+    :param window: bool array of shape (size, size)
+    :param origin: (x, y) of the viewer
+    :param radius: radius of the field of view in tiles
+    :return: None
+    """
+    height, width = mask.shape
+    x, y = origin
+    left, top = max(0, x - radius), max(0, y - radius)
+    right, bottom = min(width, x + radius + 1), min(height, y + radius + 1)
+    mask[top:bottom, left:right] = window[top - y + radius:bottom - y + radius, left - x + radius:right - x + radius]
+
+
+def compute_fov(transparent: np.ndarray, origin: tuple[int, int], radius: int = const.FOV_RADIUS) -> np.ndarray:
+    """
+    Function used to compute the field of view of one viewer.
+    Use FieldOfView when the same map is used for many calculations, it doesn't pad the map every time.
+    :param transparent: bool array of shape (height, width), True where the light passes
+    :param origin: (x, y) of the viewer
+    :param radius: radius of the field of view in tiles
+    :return: bool array of shape (height, width), True where the viewer sees
+    """
+    kernel = get_kernel(radius)
+    window = compute_windows(pad_grid(transparent, radius), np.array([origin]), kernel)[0]
+    mask = np.zeros(transparent.shape, dtype=bool)
+    paste_window(mask, window.reshape(kernel.size, kernel.size), origin, radius)
+    return mask
+
+
+def compute_fov_batch(transparent: np.ndarray, origins: Sequence[tuple[int, int]],
+                      radius: int = const.FOV_RADIUS) -> np.ndarray:
+    """
+    Function used to compute the field of view of many viewers, e.g. all monsters, in one call.
+    Only the window around every viewer is returned, tile (x, y) is at [i, y - origin y + radius, x - origin x + radius].
+    :param transparent: bool array of shape (height, width), True where the light passes
+    :param origins: (x, y) of the viewers
+    :param radius: radius of the field of view in tiles
+    :return: bool array of shape (len(origins), 2 * radius + 1, 2 * radius + 1)
+    """
+    kernel = get_kernel(radius)
+    windows = compute_windows(pad_grid(transparent, radius), np.array(origins, dtype=np.intp).reshape(-1, 2), kernel)
+    return windows.reshape(-1, kernel.size, kernel.size)
+
+
+def get_transparency(tile_map: "tilemap.TileMap", opaque_tiles: Sequence[int]) -> np.ndarray:
+    """
+    Function used to create the transparency grid of the TileMap
+    :param tile_map: TileMap
+    :param opaque_tiles: ids of the tiles that block the light, e.g. walls
+    :return: bool array of shape (height, width)
+    """
+    tiles = np.frombuffer(tile_map.tiles, dtype=np.uint16).reshape(tile_map.height, tile_map.width)
+    return ~np.isin(tiles, opaque_tiles)
+
+
+class FieldOfView:
+    """
+    Class used to keep the field of view of a viewer, e.g. the player, up to date.
+    The field of view is computed again only when the viewer moved or a tile that the viewer could see changed.
+    """
+    def __init__(self, transparent: np.ndarray, radius: int = const.FOV_RADIUS):
+        self.kernel: FovKernel = get_kernel(radius)
+        self.radius: int = radius
+        self.padded: np.ndarray = pad_grid(transparent, radius)
+        self.visible: np.ndarray = np.zeros(transparent.shape, dtype=bool)  # True where the viewer sees
+        self.origin: Optional[tuple[int, int]] = None  # Viewer of the last calculation
+        self.dirty: bool = True  # Field of view has to be computed again
+        self.computed: int = 0  # Number of calculations done
+
+    def set_transparent(self, x: int, y: int, transparent: bool) -> None:
+        """
+        Changes the tile, e.g. when a door opens, the field of view is computed again only if the tile is in range
+        :param x: column of the tile
+        :param y: row of the tile
+        :param transparent: True if the light passes through the tile
+        :return: None
+        """
+        value = TRANSPARENT if transparent else OPAQUE
+        if self.padded[y + self.radius, x + self.radius] == value:
+            return
+        self.padded[y + self.radius, x + self.radius] = value
+        if self.origin is not None and max(abs(x - self.origin[0]), abs(y - self.origin[1])) <= self.radius:
+            self.dirty = True
+
+    def update(self, origin: tuple[int, int]) -> np.ndarray:
+        """
+        Returns the field of view from the point, computes it only if something changed
+        :param origin: (x, y) of the viewer
+        :return: bool array of shape (height, width), True where the viewer sees, it is reused by the next update
+        """
+        origin = (int(origin[0]), int(origin[1]))
+        if not self.dirty and origin == self.origin:
+            return self.visible
+        window = compute_windows(self.padded, np.array([origin]), self.kernel)[0]
+        if self.origin is not None:
+            x, y = self.origin
+            self.visible[max(0, y - self.radius):y + self.radius + 1, max(0, x - self.radius):x + self.radius + 1] = False
+        paste_window(self.visible, window.reshape(self.kernel.size, self.kernel.size), origin, self.radius)
+        self.origin = origin
+        self.dirty = False
+        self.computed += 1
+        return self.visible
@@ -5,6 +5,8 @@ import constants as const
 import root
 import scenes
 import assets
+import profiler
+from tracing import tracer
 
 
 class Game:  # TODO Rename this to the game name later
@@ -13,10 +15,11 @@ class Game:  # TODO Rename this to the game name later
     If you want to run the game you should create the Game object and call run() method.
     """
 
-    def __init__(self, start_scene: Optional[Type[root.Scene]]=scenes.MainMenu):
+    def __init__(self, start_scene: Optional[Type[root.Scene]]=scenes.MainMenu, fixed_timestep: bool=False):
         """
         Initialise the game
         :param start_scene: Scene used at the start
+        :param fixed_timestep: update the scene at the constant const.TICK_RATE instead of once per frame
         """
         const.program = self
         pygame.init()
@@ -25,7 +28,17 @@ class Game:  # TODO Rename this to the game name later
         self.assets: assets.Assets = assets.Assets()
         self.assets.load()
         self.manager: root.SceneManager = root.SceneManager()
-        self.dt: int = 0
+        self.dt: float = 0  # Seconds simulated by the current update
+        self.frame_time: float = 0  # Seconds the last frame took
+        self.fixed_timestep: bool = fixed_timestep
+        self.tick_rate: int = const.TICK_RATE
+        self.max_catch_up_steps: int = const.MAX_CATCH_UP_STEPS
+        self.accumulator: float = 0  # Seconds of the simulation time that haven't been updated yet
+        self.simulated_time: float = pygame.time.get_ticks()  # Milliseconds simulated in the fixed timestep mode
+        # Part of the next simulation step that has passed, 1 outside the fixed timestep mode.
+        # Nothing is interpolated by the engine, scenes that want smooth movement read it in render().
+        self.alpha: float = 1
+        self.profiler: profiler.FrameProfiler = profiler.FrameProfiler()
         self.manager.go_to(start_scene)
 
     def run(self) -> None:
@@ -34,14 +47,129 @@ class Game:  # TODO Rename this to the game name later
         :return: None
         """
         while True:
-            scene = self.get_scene()
-            pygame.display.set_caption(f"{self.clock.get_fps():.2f}")
-            scene.update_state()
-            scene.events(pygame.event.get())
+            self.step(pygame.event.get())
+            self.frame_time = self.clock.tick(const.FPS) / 1000
+            if not self.fixed_timestep:
+                self.dt = self.frame_time
+
+    def step(self, events: list[pygame.event.Event], mouse_pos: Optional[tuple[int, int]] = None) -> None:
+        """
+        Runs one frame of the game loop, without waiting for the frame rate, phases are measured by the profiler
+        :param events: pygame events of the frame
+        :param mouse_pos: position used instead of the real mouse position, e.g. by the benchmark
+        :return: None
+        """
+        frame_profiler = self.profiler
+        self.manager.update()
+        scene = self.get_scene()
+        frame_profiler.begin_frame()
+        scene.update_state(mouse_pos)
+        frame_profiler.lap(profiler.UPDATE_STATE)
+        scene.events(events)
+        frame_profiler.lap(profiler.EVENTS)
+        if self.fixed_timestep:
+            self.fixed_update()
+        else:
+            self.manager.scheduler.update(self.get_time())
             scene.update()
-            scene.render(self.screen)
+        frame_profiler.lap(profiler.UPDATE)
+        scene.render(self.screen)
+        if frame_profiler.visible:
+            self.render_profiler()
+        frame_profiler.lap(profiler.RENDER)
+        self.update_display()
+        frame_profiler.lap(profiler.FLIP)
+        if frame_profiler.end_frame():
+            pygame.display.set_caption(f"{self.clock.get_fps():.2f}")
+
+    def fixed_update(self) -> None:
+        """
+        Runs as many simulation steps of 1 / tick_rate seconds as the time of the last frame needs.
+        At most max_catch_up_steps are run per frame, the time that is still left after that is dropped,
+        so under load the game slows down instead of falling further behind.
+        Timers run on the simulated time, which moves by one step before every update, so they slow down with the game.
+        :return: None
+        """
+        step = 1 / self.tick_rate
+        self.dt = step
+        self.accumulator += self.frame_time
+        steps = 0
+        while self.accumulator >= step and steps < self.max_catch_up_steps:
+            self.simulated_time += step * 1000
+            self.manager.scheduler.update(self.get_time())
+            self.get_scene().update()
+            self.accumulator -= step
+            steps += 1
+        if self.accumulator >= step:
+            self.accumulator %= step
+        self.alpha = self.accumulator / step
+
+    def get_time(self) -> int:
+        """
+        Returns the time the Timers run on
+        :return: simulated milliseconds in the fixed timestep mode, otherwise milliseconds since pygame.init()
+        """
+        if self.fixed_timestep:
+            return int(self.simulated_time)
+        return pygame.time.get_ticks()
+
+    def render_profiler(self) -> None:
+        """
+        Draws the profiler overlay, in dirty render mode its area is redrawn every frame
+        :return: None
+        """
+        area = self.profiler.render(self.screen)
+        object_manager = self.get_object_manager()
+        if object_manager.dirty_render:
+            object_manager.updated_rects.append(area)
+            object_manager.dirty_rects.append(area.copy())
+
+    def toggle_profiler(self) -> None:
+        """
+        Shows or hides the profiler overlay
+        :return: None
+        """
+        self.profiler.toggle()
+        self.get_object_manager().full_redraw = True
+
+    def toggle_cost_tracking(self) -> None:
+        """
+        Starts measuring the update and render time per object class,
+        or stops it and prints the report of the most expensive classes
+        :return: None
+        """
+        object_manager = self.get_object_manager()
+        if object_manager.cost_tracker is None:
+            object_manager.cost_tracker = profiler.CostTracker()
+        else:
+            print(object_manager.cost_tracker.report())
+            object_manager.cost_tracker = None
+        self.profiler.cost_tracker = object_manager.cost_tracker
+
+    def toggle_tracing(self) -> None:
+        """
+        Starts recording the trace, or stops it and writes it to const.TRACE_FILE
+        :return: None
+        """
+        if not tracer.enabled:
+            tracer.start()
+        else:
+            tracer.stop()
+            tracer.write(const.TRACE_FILE)
+            print(f"Trace with {tracer.count} events written to {const.TRACE_FILE}")
+
+    def update_display(self) -> None:
+        """
+        Shows the rendered frame, in dirty render mode only the redrawn regions are updated
+        :return: None
+        """
+        object_manager = self.get_object_manager()
+        if object_manager.dirty_render:
+            if object_manager.updated_rects:
+                pygame.display.update(object_manager.updated_rects)
+                object_manager.updated_rects = []
+        else:
             pygame.display.flip()
-            self.dt = self.clock.tick(const.FPS) / 1000
 
     def quit(self) -> None:
         """
@@ -64,6 +192,13 @@ class Game:  # TODO Rename this to the game name later
         """
         return self.manager.object_manager.event_manager
 
+    def get_hover_manager(self) -> root.HoverManager:
+        """
+        Returns the HoverManager of the game
+        :return: hover manager
+        """
+        return self.manager.object_manager.hover_manager
+
     def get_scene(self) -> root.Scene:
         """
         Returns the currently active Scene
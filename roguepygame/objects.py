@@ -1,5 +1,4 @@
 import pygame
-import constants as const
 import root
 
 
@@ -16,5 +15,5 @@ class RandomObject(root.DrawableObject):  # TODO: Remove, this is just for testi
     def update(self):
         self.pos.x += self.program.dt * self.velocity.x
         self.rect.x = round(self.pos.x)
-        if self.rect.left > const.WIDTH:
+        if self.rect.left > self.program.get_scene().camera.rect.right:
             self.destroy_object()
@@ -0,0 +1,230 @@
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+import numpy as np
+import constants as const
+
+UNREACHABLE: int = np.iinfo(np.int32).max // 2  # Distance of the tiles from which no goal can be reached
+
+
+class DijkstraMap:
+    """
+    Distance from every tile of the map to the nearest goal, also called the flow field.
+    Monsters walk to the goal by stepping to the neighbour with the smallest distance,
+    next steps of all tiles are precomputed, so picking the step is one array lookup.
+    Arrays are flattened and padded by one tile of walls, use Pathfinder to get the maps.
+    """
+    def __init__(self, pathfinder: "Pathfinder", goals: frozenset[tuple[int, int]]):
+        self.pathfinder: Pathfinder = pathfinder
+        self.goals: frozenset[tuple[int, int]] = goals
+        self.distances: np.ndarray = np.full(pathfinder.costs.shape, UNREACHABLE, dtype=np.int32)
+        self.next_cells: Optional[np.ndarray] = None  # Index of the next step of every cell, computed when needed
+        # Rows of the padded grid whose next_cells have to be computed again
+        self.dirty_rows: Optional[tuple[int, int]] = (1, pathfinder.height + 1)
+        seeds = np.array([pathfinder.get_index(x, y) for x, y in goals], dtype=np.intp)
+        seeds = seeds[pathfinder.costs[seeds] > 0]
+        self.distances[seeds] = 0
+        pathfinder.relax(self.distances, seeds)
+
+    def get_distance(self, x: int, y: int) -> int:
+        """
+        Returns the distance from the tile to the nearest goal
+        :param x: column of the tile
+        :param y: row of the tile
+        :return: sum of the costs of the tiles on the way, UNREACHABLE if no goal can be reached
+        """
+        return int(self.distances[self.pathfinder.get_index(x, y)])
+
+    def update_next_cells(self) -> np.ndarray:
+        """
+        Computes the next steps of the rows that changed, or of all cells the first time
+        :return: index of the next step of every cell, the cell itself if it is a goal or no goal can be reached
+        """
+        pathfinder = self.pathfinder
+        if self.next_cells is None:
+            self.next_cells = np.arange(len(self.distances), dtype=np.intp)
+        if self.dirty_rows is not None:
+            top, bottom = self.dirty_rows
+            rows = np.arange(top, bottom, dtype=np.intp)[:, None] * pathfinder.row_size
+            cells = (rows + np.arange(1, pathfinder.width + 1)).ravel()
+            neighbours = cells[:, None] + pathfinder.neighbours
+            neighbour_distances = self.distances[neighbours]
+            best = neighbour_distances.argmin(axis=1)
+            closer = neighbour_distances[np.arange(len(cells)), best] < self.distances[cells]
+            self.next_cells[cells] = np.where(closer, neighbours[np.arange(len(cells)), best], cells)
+            self.dirty_rows = None
+        return self.next_cells
+
+    def mark_rows(self, top: int, bottom: int) -> None:
+        """
+        Marks the rows whose next steps have to be computed again, neighbours of the rows are included
+        :param top: first row of the padded grid
+        :param bottom: row after the last row of the padded grid
+        :return: None
+        """
+        top, bottom = max(1, top - 1), min(self.pathfinder.height + 1, bottom + 1)
+        if self.dirty_rows is not None:
+            top, bottom = min(top, self.dirty_rows[0]), max(bottom, self.dirty_rows[1])
+        self.dirty_rows = (top, bottom)
+
+    def next_step(self, x: int, y: int) -> tuple[int, int]:
+        """
+        Returns the tile the monster on the tile should step to
+        :param x: column of the tile
+        :param y: row of the tile
+        :return: (x, y) of the next tile, the same tile if it is a goal or no goal can be reached
+        """
+        next_cells = self.next_cells if self.dirty_rows is None else self.update_next_cells()
+        return self.pathfinder.get_position(next_cells[self.pathfinder.get_index(x, y)])
+
+    def next_steps(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Returns the next steps of many monsters at once
+        :param positions: int array of shape (n, 2), (x, y) of the monsters
+        :return: int array of shape (n, 2), (x, y) of the next tiles
+        """
+        next_cells = self.next_cells if self.dirty_rows is None else self.update_next_cells()
+        positions = np.asarray(positions, dtype=np.intp).reshape(-1, 2)
+        row_size = self.pathfinder.row_size
+        cells = next_cells[(positions[:, 1] + 1) * row_size + positions[:, 0] + 1]
+        return np.stack([cells % row_size - 1, cells // row_size - 1], axis=1)
+
+
+class Pathfinder:
+    """
+    Class used to compute and cache the Dijkstra maps of the tile grid.
+    Every tile has the cost of entering it, 0 means the tile can't be entered, e.g. a wall.
+    Maps are computed with the bucket queue version of Dijkstra's algorithm, one bucket of cells is relaxed
+    with array operations at once. Maps are cached per set of goals, least recently used ones are removed.
+    When a tile changes, maps that reach it are repaired if the tile got cheaper, or computed again when used next time.
+    """
+    def __init__(self, costs: np.ndarray, diagonal: bool = True, cache_size: int = const.PATHFINDING_CACHE_SIZE):
+        self.height, self.width = costs.shape
+        self.row_size: int = self.width + 2
+        # Costs padded by one tile of walls and flattened, so every cell of the map has all neighbours
+        self.costs: np.ndarray = np.pad(costs.astype(np.int32), 1).ravel()
+        offsets = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+        if diagonal:
+            offsets += [(-1, -1), (1, -1), (-1, 1), (1, 1)]
+        self.neighbours: np.ndarray = np.array([dy * self.row_size + dx for dx, dy in offsets], dtype=np.intp)
+        self.maps: OrderedDict[frozenset[tuple[int, int]], DijkstraMap] = OrderedDict()  # Least recently used first
+        self.cache_size: int = cache_size
+        self.stale: set[frozenset[tuple[int, int]]] = set()  # Goals of the maps that have to be computed again
+        self.computed: int = 0  # Number of maps computed from scratch
+
+    def get_index(self, x: int, y: int) -> int:
+        """
+        Returns the index of the tile in the flattened padded arrays
+        :param x: column of the tile
+        :param y: row of the tile
+        :return: index
+        """
+        return (y + 1) * self.row_size + x + 1
+
+    def get_position(self, index: int) -> tuple[int, int]:
+        """
+        Returns the tile at the index of the flattened padded arrays
+        :param index: index
+        :return: (x, y) of the tile
+        """
+        y, x = divmod(int(index), self.row_size)
+        return x - 1, y - 1
+
+    def relax(self, distances: np.ndarray, seeds: np.ndarray) -> tuple[int, int]:
+        """
+        Lowers the distances of the cells that can be reached cheaper through the seeds, until nothing changes.
+        Cells are processed in buckets of the same distance, so every cell is finished when its bucket is processed.
+        :param distances: flattened padded distances, changed in place
+        :param seeds: indices of the cells whose distance was lowered
+        :return: first row and the row after the last row that changed, of the padded grid
+        """
+        buckets: dict[int, list[np.ndarray]] = {}
+        for distance in np.unique(distances[seeds]):
+            buckets[int(distance)] = [seeds[distances[seeds] == distance]]
+        changed_min, changed_max = len(distances), -1
+        costs = self.costs
+        while buckets:
+            distance = min(buckets)
+            cells = np.unique(np.concatenate(buckets.pop(distance)))
+            cells = cells[distances[cells] == distance]  # Cells lowered again later are in another bucket
+            if not len(cells):
+                continue
+            changed_min, changed_max = min(changed_min, int(cells[0])), max(changed_max, int(cells[-1]))
+            neighbours = (cells[:, None] + self.neighbours).ravel()
+            neighbour_costs = costs[neighbours]
+            new_distances = distance + neighbour_costs
+            better = (neighbour_costs > 0) & (new_distances < distances[neighbours])
+            neighbours, new_distances = neighbours[better], new_distances[better]
+            np.minimum.at(distances, neighbours, new_distances)
+            for new_distance in np.unique(new_distances):
+                buckets.setdefault(int(new_distance), []).append(neighbours[new_distances == new_distance])
+        return changed_min // self.row_size, changed_max // self.row_size + 1
+
+    def get_map(self, goals: Iterable[tuple[int, int]]) -> DijkstraMap:
+        """
+        Returns the map of the distances to the goals, it is computed only if it isn't cached
+        :param goals: (x, y) of the goals, e.g. the player, items or stairs
+        :return: DijkstraMap
+        """
+        key = frozenset(goals)
+        dijkstra_map = self.maps.get(key)
+        if dijkstra_map is not None and key not in self.stale:
+            self.maps.move_to_end(key)
+            return dijkstra_map
+        self.stale.discard(key)
+        dijkstra_map = self.maps[key] = DijkstraMap(self, key)
+        self.maps.move_to_end(key)
+        self.computed += 1
+        while len(self.maps) > self.cache_size:
+            self.stale.discard(self.maps.popitem(last=False)[0])
+        return dijkstra_map
+
+    def set_cost(self, x: int, y: int, cost: int) -> None:
+        """
+        Changes the cost of the tile, e.g. when a door opens or a wall is dug out.
+        Maps that reach the tile are repaired if it got cheaper, otherwise they are computed again when used next time.
+        :param x: column of the tile
+        :param y: row of the tile
+        :param cost: cost of entering the tile, 0 if it can't be entered
+        :return: None
+        """
+        index = self.get_index(x, y)
+        old_cost = int(self.costs[index])
+        if old_cost == cost:
+            return
+        self.costs[index] = cost
+        for key, dijkstra_map in self.maps.items():
+            if key in self.stale:
+                continue
+            distances = dijkstra_map.distances
+            if (x, y) in key:
+                self.stale.add(key)  # Goal changed
+            elif cost == 0 or (old_cost and cost > old_cost):
+                if distances[index] < UNREACHABLE:
+                    self.stale.add(key)  # Paths through the tile got longer
+            else:
+                # Tile got cheaper, the distances can only go down, starting from the tile
+                reached = distances[index + self.neighbours]
+                new_distance = int(reached.min()) + cost
+                if new_distance < distances[index]:
+                    distances[index] = new_distance
+                    top, bottom = self.relax(distances, np.array([index], dtype=np.intp))
+                    dijkstra_map.mark_rows(top, bottom)
+
+    def next_step(self, position: tuple[int, int], goals: Iterable[tuple[int, int]]) -> tuple[int, int]:
+        """
+        Returns the tile the monster should step to, to get closer to the nearest goal
+        :param position: (x, y) of the monster
+        :param goals: (x, y) of the goals
+        :return: (x, y) of the next tile
+        """
+        return self.get_map(goals).next_step(*position)
+
+    def next_steps(self, positions: np.ndarray, goals: Iterable[tuple[int, int]]) -> np.ndarray:
+        """
+        Returns the next steps of many monsters walking to the same goals
+        :param positions: int array of shape (n, 2), (x, y) of the monsters
+        :param goals: (x, y) of the goals
+        :return: int array of shape (n, 2), (x, y) of the next tiles
+        """
+        return self.get_map(goals).next_steps(positions)
@@ -0,0 +1,251 @@
+import json
+import time
+from array import array
+from typing import Iterable, Optional, TYPE_CHECKING
+
+import pygame
+import constants as const
+import fonts
+from tracing import tracer
+if TYPE_CHECKING:
+    import root
+
+# Phases of the game loop in the order they are run
+PHASES: tuple[str, ...] = ('update_state', 'events', 'update', 'render', 'flip')
+UPDATE_STATE, EVENTS, UPDATE, RENDER, FLIP = range(len(PHASES))
+PHASE_COLORS: tuple[str, ...] = ('GRAY', 'BLUE', 'GREEN', 'ORANGE', 'RED')
+
+GRAPH_SIZE: tuple[int, int] = (240, 80)
+GRAPH_SCALE_MS: float = 1000 / const.FPS  # Frame time at the top of the graph
+
+
+class FrameProfiler:
+    """
+    Class used to measure how long each phase of the game loop takes.
+    Times of the last const.PROFILER_FRAMES frames are kept in a ring buffer.
+    Overlay with the graph of the frame times and the min/avg/max of every phase can be drawn on the screen.
+    """
+    def __init__(self, frames: int = const.PROFILER_FRAMES):
+        self.frames: int = frames
+        self.times: list[array] = [array('q', bytes(8 * frames)) for _ in PHASES]  # Nanoseconds per phase
+        self.frame: int = 0  # Index of the current frame in the ring buffer
+        self.recorded: int = 0  # Number of frames recorded, up to self.frames
+        self.last_lap: int = 0
+        self.last_refresh: int = 0  # pygame ticks of the last stats refresh
+        self.visible: bool = False
+        self.font: pygame.font.Font = fonts.get_font(14)
+        self.graph: pygame.Surface = pygame.Surface(GRAPH_SIZE)
+        self.graph.fill("BLACK")
+        self.stats_image: pygame.Surface = pygame.Surface((0, 0))
+        self.cost_tracker: Optional[CostTracker] = None  # Top offenders are shown in the overlay if set
+
+    def begin_frame(self) -> None:
+        """
+        Starts measuring the frame
+        :return: None
+        """
+        self.last_lap = time.perf_counter_ns()
+
+    def lap(self, phase: int) -> None:
+        """
+        Records the time since the last lap as the time of the phase, also as a span of the trace
+        :param phase: index of the phase in PHASES
+        :return: None
+        """
+        now = time.perf_counter_ns()
+        self.times[phase][self.frame] = now - self.last_lap
+        if tracer.enabled:
+            tracer.complete(PHASES[phase], self.last_lap, now - self.last_lap)
+        self.last_lap = now
+
+    def end_frame(self) -> bool:
+        """
+        Finishes the frame and moves to the next slot of the ring buffer
+        :return: True if const.PROFILER_REFRESH_INTERVAL has passed and the stats were refreshed
+        """
+        if self.visible:
+            self.draw_graph_column()
+        self.frame = (self.frame + 1) % self.frames
+        self.recorded = min(self.recorded + 1, self.frames)
+        now = pygame.time.get_ticks()
+        if now - self.last_refresh < const.PROFILER_REFRESH_INTERVAL:
+            return False
+        self.last_refresh = now
+        if self.visible:
+            self.render_stats()
+        return True
+
+    def get_last_frame(self) -> list[int]:
+        """
+        Returns the times of the phases of the last finished frame
+        :return: nanoseconds of every phase, in the order of PHASES
+        """
+        frame = (self.frame - 1) % self.frames
+        return [times[frame] for times in self.times]
+
+    def get_stats(self, phase: int) -> tuple[float, float, float]:
+        """
+        Returns the statistics of the phase over the recorded frames
+        :param phase: index of the phase in PHASES
+        :return: min, avg and max time in milliseconds
+        """
+        if not self.recorded:
+            return 0, 0, 0
+        times = self.times[phase][:self.recorded]
+        return min(times) / 1_000_000, sum(times) / self.recorded / 1_000_000, max(times) / 1_000_000
+
+    def toggle(self) -> None:
+        """
+        Shows or hides the overlay
+        :return: None
+        """
+        self.visible = not self.visible
+        if self.visible:
+            self.render_stats()
+
+    def draw_graph_column(self) -> None:
+        """
+        Scrolls the graph by one pixel and draws the phase times of the current frame in the last column
+        :return: None
+        """
+        width, height = GRAPH_SIZE
+        self.graph.scroll(-1, 0)
+        self.graph.fill("BLACK", (width - 1, 0, 1, height))
+        bottom = height
+        for phase, color in enumerate(PHASE_COLORS):
+            bar = round(self.times[phase][self.frame] / 1_000_000 / GRAPH_SCALE_MS * height)
+            if bar > 0:
+                self.graph.fill(color, (width - 1, max(0, bottom - bar), 1, bar))
+                bottom -= bar
+                if bottom <= 0:
+                    break
+
+    def render_stats(self) -> None:
+        """
+        Creates the Surface with the min/avg/max of every phase
+        :return: None
+        """
+        lines = [self.font.render(f"{'phase':<12} min/avg/max ms", True, "WHITE")]
+        for phase, (name, color) in enumerate(zip(PHASES, PHASE_COLORS)):
+            low, avg, high = self.get_stats(phase)
+            lines.append(self.font.render(f"{name:<12} {low:.2f}/{avg:.2f}/{high:.2f}", True, color))
+        if self.cost_tracker is not None:
+            lines.append(self.font.render("pass   object   total ms   calls", True, "WHITE"))
+            for kind, label, total, calls in self.cost_tracker.top(5):
+                lines.append(self.font.render(f"{kind}   {label}   {total:.2f}   {calls}", True, "YELLOW"))
+        line_height = self.font.get_linesize()
+        self.stats_image = pygame.Surface((max(line.get_width() for line in lines), line_height * len(lines)))
+        for i, line in enumerate(lines):
+            self.stats_image.blit(line, (0, i * line_height))
+
+    def render(self, screen: pygame.Surface) -> pygame.Rect:
+        """
+        Draws the overlay in the top left corner of the screen
+        :param screen: game window
+        :return: area covered by the overlay
+        """
+        graph_rect = screen.blit(self.graph, (0, 0))
+        stats_rect = screen.blit(self.stats_image, graph_rect.bottomleft)
+        return graph_rect.union(stats_rect)
+
+
+class CostTracker:
+    """
+    Class used to find out which objects take the most time to update and render.
+    Time and number of calls are summed per class, or per class and GameObject.name if by_name is True.
+    It is enabled by setting ObjectManager.cost_tracker.
+    """
+    def __init__(self, by_name: bool = False):
+        self.by_name: bool = by_name
+        self.costs: dict[str, dict[str, list[int]]] = {'update': {}, 'render': {}}  # pass -> label -> [ns, calls]
+
+    def get_label(self, obj: "root.GameObject") -> str:
+        """
+        Returns the name under which the cost of the object is summed
+        :param obj: GameObject
+        :return: class name, followed by the object name if by_name is True
+        """
+        if self.by_name and obj.name is not None:
+            return f"{obj.__class__.__name__}:{obj.name}"
+        return obj.__class__.__name__
+
+    def add_cost(self, kind: str, obj: "root.GameObject", duration: int) -> None:
+        """
+        Adds the duration of one call
+        :param kind: 'update' or 'render'
+        :param obj: GameObject that was called
+        :param duration: time in nanoseconds
+        :return: None
+        """
+        label = self.get_label(obj)
+        entry = self.costs[kind].get(label)
+        if entry is None:
+            self.costs[kind][label] = [duration, 1]
+        else:
+            entry[0] += duration
+            entry[1] += 1
+
+    def update_objects(self, objects: Iterable["root.GameObject"]) -> None:
+        """
+        Calls update() of the objects and measures it
+        :param objects: GameObjects to update
+        :return: None
+        """
+        for obj in objects:
+            start = time.perf_counter_ns()
+            obj.update()
+            self.add_cost('update', obj, time.perf_counter_ns() - start)
+
+    def render_objects(self, objects: Iterable["root.DrawableObject"], screen: pygame.Surface) -> None:
+        """
+        Calls render() of the objects and measures it
+        :param objects: DrawableObjects to render
+        :param screen: game window
+        :return: None
+        """
+        for obj in objects:
+            start = time.perf_counter_ns()
+            obj.render(screen)
+            self.add_cost('render', obj, time.perf_counter_ns() - start)
+
+    def top(self, count: int = 10) -> list[tuple[str, str, float, int]]:
+        """
+        Returns the labels that took the most time
+        :param count: number of labels to return
+        :return: list of (pass, label, total time in milliseconds, calls), the most expensive first
+        """
+        rows = [(kind, label, duration / 1_000_000, calls)
+                for kind, costs in self.costs.items() for label, (duration, calls) in costs.items()]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:count]
+
+    def report(self, count: int = 10) -> str:
+        """
+        Returns the table of the labels that took the most time
+        :param count: number of labels in the table
+        :return: text of the table
+        """
+        lines = [f"{'pass':<8}{'object':<40}{'total ms':>12}{'calls':>10}{'avg us':>10}"]
+        for kind, label, total, calls in self.top(count):
+            lines.append(f"{kind:<8}{label:<40}{total:>12.3f}{calls:>10}{total * 1000 / calls:>10.2f}")
+        return '\n'.join(lines)
+
+    def dump(self, path: str) -> None:
+        """
+        Writes all costs to the JSON file
+        :param path: path of the file
+        :return: None
+        """
+        data = {kind: {label: {'total_ms': duration / 1_000_000, 'calls': calls}
+                       for label, (duration, calls) in costs.items()}
+                for kind, costs in self.costs.items()}
+        with open(path, 'w') as file:
+            json.dump(data, file, indent=2)
+
+    def reset(self) -> None:
+        """
+        Forgets all measured costs
+        :return: None
+        """
+        for costs in self.costs.values():
+            costs.clear()
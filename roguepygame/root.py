@@ -1,11 +1,22 @@
-from typing import Optional, Type, Any, Callable, TYPE_CHECKING, Protocol
+import bisect
+import heapq
+from typing import Optional, Type, Any, Callable, Iterable, Iterator, TYPE_CHECKING, Protocol
 
 import pygame
 import constants as const
+import camera
+import spatial
+from tracing import tracer
 if TYPE_CHECKING:
+    import assets
     import game
+    import profiler
     class SupportsEvents(Protocol):
-        def events(self, event: pygame.event.Event) -> None: ...
+        def events(self, event: pygame.event.Event) -> Optional[bool]: ...
+    class SupportsHover(Protocol):
+        rect: Optional[pygame.Rect]
+        def on_hover_enter(self) -> None: ...
+        def on_hover_leave(self) -> None: ...
 
 
 class Scene:
@@ -13,12 +24,17 @@ class Scene:
     Class used to represent the game scene
     it is responsible for processing the events, updating the game state, and rendering the game
     """
+    dirty_render: bool = False  # Redraw only the regions of the screen that have changed
+    asset_manifest: tuple[str, ...] = ()  # Names of the images the scene uses, preloaded by SceneManager.load_and_go_to()
+
     def __init__(self, **kwargs):
         self.program: game.Game = const.program
         self.object_manager: ObjectManager = self.program.get_object_manager()
         self.state: dict[str, Any] = {
             'mouse_pos': (-1000, -1000)  # TODO Reconsider if we need this information
         }
+        self.background: pygame.Color = pygame.Color("LIGHTGRAY")
+        self.camera: camera.Camera = camera.Camera()  # Part of the world shown on the screen
 
     def start(self) -> None:
         """
@@ -31,13 +47,19 @@ class Scene:
         """
         Method used to process the events returned by pygame.event.get()
         Gets called at the start of the game loop.
-        Default implementation checks for QUIT event and calls events for objects
+        Default implementation checks for QUIT event, handles the profiler keys and calls events for objects
         :param events: pygame events
         :return: None
         """
         for event in events:
             if event.type == pygame.QUIT:
                 self.program.quit()
+            elif event.type == pygame.KEYDOWN and event.key == const.PROFILER_KEY:
+                self.program.toggle_profiler()
+            elif event.type == pygame.KEYDOWN and event.key == const.COST_TRACKER_KEY:
+                self.program.toggle_cost_tracking()
+            elif event.type == pygame.KEYDOWN and event.key == const.TRACE_KEY:
+                self.program.toggle_tracing()
         self.object_manager.object_events(events)
 
     def update(self) -> None:
@@ -60,6 +82,15 @@ class Scene:
         """
         raise NotImplementedError(f"{self.__class__.__name__} Scene must implement render method!")
 
+    def render_background(self, screen: pygame.Surface) -> None:
+        """
+        Method used to draw the background of the scene.
+        In dirty render mode it gets called with the clip area set to the region that is redrawn.
+        :param screen: Game window
+        :return: None
+        """
+        screen.fill(self.background)
+
     def end(self) -> None:
         """
         Method called before swapping to another scene.
@@ -67,25 +98,54 @@ class Scene:
         """
         pass
 
-    def update_state(self):
+    def update_state(self, mouse_pos: Optional[tuple[int, int]] = None):
         """
         Method that updates the state of the program
+        :param mouse_pos: position used instead of the real mouse position, e.g. by the benchmark
         :return: None
         """
-        self.state['mouse_pos'] = pygame.mouse.get_pos()
+        self.state['mouse_pos'] = pygame.mouse.get_pos() if mouse_pos is None else mouse_pos
+        self.object_manager.hover_manager.update(self.state['mouse_pos'], self.object_manager.get_offset())
 
 
 class SceneManager:
     """
     Class used to manage the scenes.
     It gives the ability to swap between the scenes.
-    Also contains the ObjectManager for the game.
+    Also contains the ObjectManager and the timer Scheduler for the game.
     This object shouldn't be initialised, but rather called from the Game class.
     """
     def __init__(self):
         self.program: game.Game = const.program
         self.scene: Optional[Scene] = None
         self.object_manager: ObjectManager = ObjectManager()
+        self.scheduler: Scheduler = Scheduler()
+        self.loading: Optional[assets.PreloadJob] = None  # Assets of the scene that is going to be loaded
+        self.next_scene: Optional[tuple[Type[Scene], dict[str, Any]]] = None
+
+    def update(self) -> None:
+        """
+        Method that finishes the background loading of the assets, and goes to the next scene when they are loaded.
+        Gets called at the start of every iteration of the game loop.
+        :return: None
+        """
+        self.program.get_assets().update()
+        if self.loading is not None and self.loading.done:
+            scene, kwargs = self.next_scene
+            self.loading = None
+            self.next_scene = None
+            self.go_to(scene, **kwargs)
+
+    def load_and_go_to(self, scene: Type[Scene], **kwargs) -> None:
+        """
+        Method that starts loading the assets of the scene in the background, current scene keeps running.
+        Scene is changed once all images in scene.asset_manifest are loaded, progress is in self.loading.
+        :param scene: reference to the scene you want to go to
+        :param kwargs: arguments you want to pass to the new scene
+        :return: None
+        """
+        self.loading = self.program.get_assets().preload(list(scene.asset_manifest))
+        self.next_scene = (scene, kwargs)
 
     def go_to(self, scene: Type[Scene], **kwargs) -> None:
         """
@@ -95,11 +155,16 @@ class SceneManager:
         :return: None
         """
         if self.scene is not None:
-            self.scene.end()
-            self.object_manager.clear_objects()
-        self.scene = scene(**kwargs)
-        self.scene.program = self.program
-        self.scene.start()
+            with tracer.span(f"{self.scene.__class__.__name__}.end"):
+                self.scene.end()
+                self.object_manager.clear_objects()
+        self.object_manager.dirty_render = scene.dirty_render
+        self.object_manager.full_redraw = True
+        with tracer.span(f"{scene.__name__}.start"):
+            self.scene = scene(**kwargs)
+            self.scene.program = self.program
+            self.object_manager.camera = self.scene.camera
+            self.scene.start()
 
 
 class ObjectManager:
@@ -108,12 +173,76 @@ class ObjectManager:
     It contains the collection of all the active objects in the scene.
     It supports creating and destroying the objects.
     It gives the ability to iterate over all objects and call important methods.
+    Objects added or removed while the objects are updated or rendered are queued
+    and applied all at once after the pass is finished.
+    DrawableObjects in the world are kept in spatial indexes, so only the ones inside the camera are found when rendering,
+    they have to call mark_dirty() after they were moved, see refresh_drawable().
+    DrawableObjects that override update() aren't indexed, they can move every frame and re-indexing them
+    would cost more than checking their rects, which is done for them when rendering.
     You shouldn't create the instance of this object, but rather use the object already created in the Game class.
     """
     def __init__(self):
         self.program: game.Game = const.program
-        self.objects: list[GameObject] = []
+        self.all_objects: LayerBuckets = LayerBuckets()
+        self.updatables: LayerBuckets = LayerBuckets()  # Objects that override GameObject.update()
+        self.drawables: LayerBuckets = LayerBuckets()  # DrawableObjects
+        # DrawableObjects in the world with rects, only the ones inside the camera are found when rendering
+        self.static_index: spatial.SpatialHash = spatial.SpatialHash(const.CULLING_CELL_SIZE)
+        self.moving_index: spatial.SpatialHash = spatial.SpatialHash(const.CULLING_CELL_SIZE)
+        self.moving_objects: dict[int, DrawableObject] = {}  # id(obj) -> obj, DrawableObjects in moving_index or without rect
+        self.updating_drawables: dict[int, DrawableObject] = {}  # DrawableObjects that override update(), not indexed
+        self.always_drawn: dict[int, DrawableObject] = {}  # Objects in screen space and the ones without rect
+        self.draw_order: dict[int, int] = {}  # id(obj) -> layer * 2 ** 32 + number in the order it was added
+        self.drawables_added: int = 0
+        self.custom_renderers: set[int] = set()  # id(obj) of DrawableObjects that override render()
+        self.camera: Optional[camera.Camera] = None  # Camera of the active Scene, set by SceneManager.go_to()
+        self.drawn_offset: tuple[int, int] = (0, 0)  # Camera offset of the last dirty render
+        self.batch_render: bool = False  # Draw plain DrawableObjects with Surface.blits
+        self.blit_batch: list[tuple[pygame.Surface, pygame.Rect]] = []  # Reused by render_objects()
+        self.dirty_render: bool = False  # Redraw only the changed regions, set from Scene.dirty_render
+        self.full_redraw: bool = True  # Redraw the whole screen on the next dirty render
+        self.dirty_rects: list[pygame.Rect] = []  # Regions invalidated since the last render
+        self.updated_rects: list[pygame.Rect] = []  # Regions redrawn by the last dirty render
+        self.cost_tracker: Optional[profiler.CostTracker] = None  # Measures update/render time per class if set
+        self.object_layers: dict[int, int] = {}  # id(obj) -> layer of every stored object
+        self.pending: list[tuple[bool, GameObject]] = []  # Queued (is_add, obj) commands
+        self.locked: bool = False  # True while the objects are iterated over
+        self.updated_count: int = 0  # Number of objects touched by the last object_update()
+        self.rendered_count: int = 0  # Number of objects touched by the last object_render()
         self.event_manager: EventManager = EventManager()
+        self.hover_manager: HoverManager = HoverManager()
+
+    @property
+    def objects(self) -> list["GameObject"]:
+        """
+        List of all objects sorted by layer.
+        Builds a new list, use iter_objects() or object_count in the game loop.
+        :return: list of objects
+        """
+        return list(self.all_objects)
+
+    @property
+    def object_count(self) -> int:
+        """
+        Number of the objects currently stored
+        :return: number of objects
+        """
+        return len(self.object_layers)
+
+    def iter_objects(self) -> Iterator["GameObject"]:
+        """
+        Iterates over all objects sorted by layer, objects on the same layer are in the order they were added
+        :return: iterator of objects
+        """
+        return iter(self.all_objects)
+
+    def has_object(self, obj: "GameObject") -> bool:
+        """
+        Checks whether the object is stored in the ObjectManager
+        :param obj: GameObject
+        :return: True if the object is stored
+        """
+        return id(obj) in self.object_layers
 
     def object_events(self, events: list[pygame.event.Event]) -> None:
         """
@@ -128,18 +257,205 @@ class ObjectManager:
         Method used to call the update() method of all objects
         :return: None
         """
-        for obj in self.objects:
-            obj.update()
+        self.locked = True
+        self.updated_count = len(self.updatables)
+        try:
+            if self.cost_tracker is None:
+                for obj in self.updatables:
+                    obj.update()
+            else:
+                self.cost_tracker.update_objects(self.updatables)
+        finally:
+            self.locked = False
+        self.apply_pending()
 
-    def object_render(self, screen: pygame.Surface) -> None:
+    def object_render(self, screen: pygame.Surface,
+                      background: Optional[Callable[[pygame.Surface], None]] = None) -> None:
         """
-        Method used to call the render() method of all DrawableObjects
+        Method used to draw the DrawableObjects that are inside the camera.
+        While the cost tracker is enabled the objects are rendered one by one, unless the dirty render mode is on.
         :param screen: game window
+        :param background: function that draws the background before the objects
         :return: None
         """
-        for obj in self.objects:
-            if isinstance(obj, DrawableObject):
+        self.locked = True
+        try:
+            if self.dirty_render:
+                self.render_dirty(screen, background)
+            else:
+                if background is not None:
+                    background(screen)
+                visible = self.get_visible_drawables(self.get_view(screen))
+                self.rendered_count = len(visible)
+                if self.cost_tracker is not None:
+                    self.cost_tracker.render_objects(visible, screen)
+                else:
+                    self.render_objects(screen, visible)
+        finally:
+            self.locked = False
+        self.apply_pending()
+
+    def render_dirty(self, screen: pygame.Surface, background: Optional[Callable[[pygame.Surface], None]]) -> None:
+        """
+        Redraws the background and the DrawableObjects only in the regions that have changed since the last render.
+        Regions that were redrawn are stored in updated_rects, to be passed to pygame.display.update().
+        :param screen: game window
+        :param background: function that draws the background
+        :return: None
+        """
+        dirty = self.dirty_rects
+        offset = self.get_offset()
+        if offset != self.drawn_offset:  # Camera moved, everything in the world moved on the screen
+            self.drawn_offset = offset
+            self.full_redraw = True
+        for obj in self.drawables:
+            rect = obj.rect
+            if rect is not None and offset != (0, 0) and not obj.screen_space:
+                rect = rect.move(offset)
+            if obj.dirty or obj.image is not obj.drawn_image or rect != obj.drawn_rect:
+                if obj.drawn_rect is not None:
+                    dirty.append(obj.drawn_rect.union(rect) if rect is not None else obj.drawn_rect)
+                elif rect is not None:
+                    dirty.append(rect.copy())
+                obj.dirty = False
+                obj.drawn_image = obj.image
+                self.refresh_drawable(obj)  # Every object is checked here anyway, so moved ones are found
+                obj.drawn_rect = rect.copy() if rect is not None else None
+
+        screen_rect = screen.get_rect()
+        if not self.full_redraw:
+            # Merging is quadratic, too many regions are redrawn as the whole screen without trying
+            if len(dirty) > 4 * const.MAX_DIRTY_RECTS:
+                self.full_redraw = True
+            else:
+                dirty[:] = merge_rects(rect.clip(screen_rect) for rect in dirty)
+                if len(dirty) > const.MAX_DIRTY_RECTS or \
+                        sum(rect.w * rect.h for rect in dirty) >= screen_rect.w * screen_rect.h:
+                    self.full_redraw = True
+        if self.full_redraw:
+            self.full_redraw = False
+            if background is not None:
+                background(screen)
+            visible = self.get_visible_drawables(self.get_view(screen))
+            self.rendered_count = len(visible)
+            self.render_objects(screen, visible)
+            self.updated_rects = [screen_rect]
+        else:
+            self.rendered_count = 0
+            self.updated_rects = [rect for rect in dirty if rect]
+            if self.updated_rects:
+                # Same objects and order as the full redraw, found once for all regions
+                area = self.updated_rects[0].unionall(self.updated_rects)
+                regions: list[list[DrawableObject]] = [[] for _ in self.updated_rects]
+                for obj in self.get_visible_drawables(area.move(-offset[0], -offset[1])):
+                    if obj.drawn_rect is not None:
+                        for i in obj.drawn_rect.collidelistall(self.updated_rects):
+                            regions[i].append(obj)
+                for rect, objects in zip(self.updated_rects, regions):
+                    screen.set_clip(rect)
+                    if background is not None:
+                        background(screen)
+                    self.render_objects(screen, objects)
+                    self.rendered_count += len(objects)
+                screen.set_clip(None)
+        dirty.clear()
+
+    def get_offset(self) -> tuple[int, int]:
+        """
+        Returns the vector that converts the world coordinates to the screen coordinates
+        :return: camera offset, (0, 0) without the camera
+        """
+        return self.camera.offset if self.camera is not None else (0, 0)
+
+    def get_view(self, screen: pygame.Surface) -> pygame.Rect:
+        """
+        Returns the area of the world that is drawn on the screen
+        :param screen: game window
+        :return: rect in the world coordinates
+        """
+        if self.camera is not None:
+            return self.camera.rect
+        return screen.get_rect()
+
+    def get_visible_drawables(self, view: pygame.Rect) -> list["DrawableObject"]:
+        """
+        Returns the DrawableObjects to draw, sorted by layer, objects on the same layer are in the order they were added.
+        Objects in the spatial indexes are found through them, so the ones outside the view cost nothing.
+        Objects that override update() are checked with their rects, the update pass goes over them every frame anyway.
+        Objects in screen space and the ones without rect are always returned.
+        :param view: area of the world that is drawn
+        :return: list of objects
+        """
+        x0, y0, x1, y1 = self.moving_index.cell_range(view)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) * 4 >= len(self.static_index.cells) + len(self.moving_index.cells):
+            # Most of the world is on the screen, checking every object is faster than querying and sorting
+            layers = self.drawables.layers
+            return [obj for layer in self.drawables.layer_order for obj in layers[layer].values()
+                    if obj.screen_space or obj.rect is None or obj.rect.colliderect(view)]
+        visible = self.static_index.query_rect_ids(view)
+        visible.update(self.moving_index.query_rect_ids(view))
+        visible.update(self.always_drawn)
+        visible.update((key, obj) for key, obj in self.updating_drawables.items()
+                       if obj.screen_space or obj.rect is None or obj.rect.colliderect(view))
+        return [visible[key] for key in sorted(visible, key=self.draw_order.__getitem__)]
+
+    def render_objects(self, screen: pygame.Surface, objects: list["DrawableObject"]) -> None:
+        """
+        Draws the objects in the order of the list, objects in the world are moved by the camera offset.
+        DrawableObjects that don't override render() are blitted directly, with one blits call per run of them
+        if batch_render is set. Objects with custom render() are drawn in between, so the drawing order stays the same.
+        :param screen: game window
+        :param objects: DrawableObjects to draw
+        :return: None
+        """
+        offset = self.get_offset()
+        translate = offset != (0, 0)
+        batch = self.blit_batch if self.batch_render else None
+        fblits = getattr(screen, 'fblits', None)  # fblits is only available in pygame-ce
+        blits = fblits if fblits is not None else lambda sequence: screen.blits(sequence, False)
+        custom_renderers = self.custom_renderers
+        for obj in objects:
+            if id(obj) in custom_renderers:
+                if batch:
+                    blits(batch)
+                    batch.clear()
                 obj.render(screen)
+            elif obj.image is not None and obj.rect is not None:
+                rect = obj.rect.move(offset) if translate and not obj.screen_space else obj.rect
+                if batch is None:
+                    screen.blit(obj.image, rect)
+                else:
+                    batch.append((obj.image, rect))
+        if batch:
+            blits(batch)
+            batch.clear()
+
+    def refresh_drawable(self, obj: "DrawableObject") -> None:
+        """
+        Updates the object in the spatial index, gets called by DrawableObject.mark_dirty()
+        and for the objects that moved when rendering in the dirty mode
+        :param obj: DrawableObject
+        :return: None
+        """
+        key = id(obj)
+        if key in self.static_index.objects:
+            if obj.rect is not None:
+                self.static_index.move(obj, obj.rect)
+        elif key in self.moving_objects:
+            if obj.rect is None:
+                self.moving_index.remove(obj)
+                self.always_drawn[key] = obj
+            else:
+                self.moving_index.move(obj, obj.rect)
+                self.always_drawn.pop(key, None)
+
+    def move_static(self, obj: "DrawableObject") -> None:
+        """
+        Updates the static object in the spatial index, call it after the static object was moved
+        :param obj: static DrawableObject
+        :return: None
+        """
+        self.refresh_drawable(obj)
 
     def add_object(self, obj: "GameObject") -> None:
         """
@@ -147,8 +463,10 @@ class ObjectManager:
         :param obj: GameObject you want to add
         :return: None
         """
-        self.objects.append(obj)
-        self.objects.sort(key=layer_sort_key)
+        if self.locked:
+            self.pending.append((True, obj))
+        else:
+            self.store_object(obj)
 
     def remove_object(self, obj: "GameObject") -> None:
         """
@@ -156,25 +474,161 @@ class ObjectManager:
         :param obj: GameObject you want to remove
         :return: None
         """
-        self.event_manager.remove_object(obj)
-        self.objects.remove(obj)
+        if self.locked:
+            self.pending.append((False, obj))
+        else:
+            self.discard_object(obj)
 
     def clear_objects(self) -> None:
         """
         Method used to remove all objects from the list of objects
         :return: None
         """
-        copy_of_objects = self.objects.copy()
-        for obj in copy_of_objects:
-            self.remove_object(obj)
+        self.full_redraw = True
+        if self.locked:
+            queued = [obj for is_add, obj in self.pending if is_add]
+            self.pending.extend((False, obj) for obj in self.iter_objects())
+            self.pending.extend((False, obj) for obj in queued)
+        else:
+            for obj in self.objects:
+                self.discard_object(obj)
+
+    def apply_pending(self) -> None:
+        """
+        Applies the queued additions and removals in the order they were requested
+        :return: None
+        """
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+        for is_add, obj in pending:
+            if is_add:
+                self.store_object(obj)
+            else:
+                self.discard_object(obj)
+
+    def store_object(self, obj: "GameObject") -> None:
+        """
+        Stores the object in the bucket of its layer and in the indexes of the passes it takes part in
+        :param obj: GameObject
+        :return: None
+        """
+        key = id(obj)
+        if key in self.object_layers:
+            return
+        layer = layer_sort_key(obj)
+        self.object_layers[key] = layer
+        self.all_objects.add(obj, layer)
+        if type(obj).update is not GameObject.update:
+            self.updatables.add(obj, layer)
+        if isinstance(obj, DrawableObject):
+            self.drawables.add(obj, layer)
+            self.draw_order[key] = layer * 2 ** 32 + self.drawables_added
+            self.drawables_added += 1
+            if obj.static and not obj.screen_space and obj.rect is not None:
+                self.static_index.insert(obj, obj.rect)
+            elif type(obj).update is not GameObject.update:
+                self.updating_drawables[key] = obj
+            elif obj.screen_space:
+                self.always_drawn[key] = obj
+            else:
+                self.moving_objects[key] = obj
+                self.refresh_drawable(obj)
+            if type(obj).render is not DrawableObject.render:
+                self.custom_renderers.add(key)
+        obj.on_add()
+
+    def discard_object(self, obj: "GameObject") -> None:
+        """
+        Removes the object from the indexes and from the EventManager
+        :param obj: GameObject
+        :return: None
+        """
+        self.event_manager.remove_object(obj)
+        self.hover_manager.unsubscribe(obj)
+        layer = self.object_layers.pop(id(obj), None)
+        if layer is None:
+            return
+        if isinstance(obj, DrawableObject) and obj.drawn_rect is not None:
+            if self.dirty_render:
+                self.dirty_rects.append(obj.drawn_rect)
+            obj.drawn_rect = None
+        self.all_objects.remove(obj, layer)
+        self.updatables.remove(obj, layer)
+        self.drawables.remove(obj, layer)
+        self.draw_order.pop(id(obj), None)
+        self.static_index.remove(obj)
+        self.moving_index.remove(obj)
+        self.moving_objects.pop(id(obj), None)
+        self.updating_drawables.pop(id(obj), None)
+        self.always_drawn.pop(id(obj), None)
+        self.custom_renderers.discard(id(obj))
+        obj.on_remove()
+
+
+class LayerBuckets:
+    """
+    Collection of objects grouped by layer.
+    Iterates over the objects sorted by layer, objects on the same layer are in the order they were added.
+    Adding and removing the object is O(1), unless a new layer has to be created.
+    """
+    def __init__(self):
+        self.layers: dict[int, dict[int, GameObject]] = {}  # layer -> {id(obj): obj}
+        self.layer_order: list[int] = []  # Sorted keys of self.layers
+        self.count: int = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator["GameObject"]:
+        for layer in self.layer_order:
+            yield from self.layers[layer].values()
+
+    def add(self, obj: "GameObject", layer: int) -> None:
+        """
+        Adds the object to the bucket of the layer
+        :param obj: GameObject
+        :param layer: layer of the object
+        :return: None
+        """
+        bucket = self.layers.get(layer)
+        if bucket is None:
+            bucket = self.layers[layer] = {}
+            bisect.insort(self.layer_order, layer)
+        bucket[id(obj)] = obj
+        self.count += 1
+
+    def remove(self, obj: "GameObject", layer: int) -> None:
+        """
+        Removes the object from the bucket of the layer, does nothing if the object isn't there
+        :param obj: GameObject
+        :param layer: layer of the object
+        :return: None
+        """
+        bucket = self.layers.get(layer)
+        if bucket is None or bucket.pop(id(obj), None) is None:
+            return
+        self.count -= 1
+        if not bucket:
+            del self.layers[layer]
+            self.layer_order.remove(layer)
 
 
 class EventManager:
     """
-    Class used to transport pygame Events to GameObjects
+    Class used to transport pygame Events to GameObjects.
+    Pointer events are routed through a spatial index only to the objects under the cursor,
+    starting with the topmost one. An object can stop the event from reaching the objects
+    below it by returning True from events().
     """
     def __init__(self):
-        self.listeners: dict[int, list[SupportsEvents]] = {}
+        self.listeners: dict[int, dict[int, SupportsEvents]] = {}  # event type -> {id(obj): obj}
+        self.pointer_listeners: dict[int, dict[int, SupportsEvents]] = {}  # Same, for objects with a rect
+        self.pointer_objects: dict[int, SupportsEvents] = {}  # id(obj) -> obj of every pointer listener
+        self.pointer_index: spatial.SpatialHash = spatial.SpatialHash(const.SPATIAL_CELL_SIZE)
+        self.subscription_order: dict[int, int] = {}  # id(obj) -> order in which objects subscribed
+        self.subscription_count: int = 0
+        self.motion_targets: list[SupportsEvents] = []  # Objects that got the last MOUSEMOTION
 
     def subscribe(self, event_type: int, obj: "SupportsEvents") -> None:
         """
@@ -183,10 +637,15 @@ class EventManager:
         :param obj: object to check events for
         :return: None
         """
-        if event_type in self.listeners:
-            self.listeners[event_type].append(obj)
+        key = id(obj)
+        if key not in self.subscription_order:
+            self.subscription_order[key] = self.subscription_count
+            self.subscription_count += 1
+        if event_type in const.POINTER_EVENTS and hasattr(obj, 'rect'):
+            self.pointer_listeners.setdefault(event_type, {})[key] = obj
+            self.pointer_objects[key] = obj
         else:
-            self.listeners[event_type] = [obj]
+            self.listeners.setdefault(event_type, {})[key] = obj
 
     def unsubscribe(self, event_type: int, obj: "SupportsEvents") -> None:
         """
@@ -195,11 +654,16 @@ class EventManager:
         :param obj: object to remove event checking for
         :return: None
         """
-        if event_type in self.listeners:
-            if obj in self.listeners[event_type]:
-                self.listeners[event_type].remove(obj)
-            if not self.listeners[event_type]:
-                del self.listeners[event_type]
+        key = id(obj)
+        for listeners in (self.listeners, self.pointer_listeners):
+            if event_type in listeners:
+                listeners[event_type].pop(key, None)
+                if not listeners[event_type]:
+                    del listeners[event_type]
+        if key in self.pointer_objects and \
+                not any(key in listeners for listeners in self.pointer_listeners.values()):
+            del self.pointer_objects[key]
+            self.pointer_index.remove(obj)
 
     def remove_object(self, obj: "SupportsEvents") -> None:
         """
@@ -207,8 +671,9 @@ class EventManager:
         :param obj: object you wish to remove from event manager
         :return: None
         """
-        for event_type in list(self.listeners):
+        for event_type in list(self.listeners) + list(self.pointer_listeners):
             self.unsubscribe(event_type, obj)
+        self.subscription_order.pop(id(obj), None)
 
     def check_events(self, events: list[pygame.event.Event]) -> None:
         """
@@ -216,16 +681,157 @@ class EventManager:
         :param events: list of pygame Events
         :return: None
         """
+        if tracer.enabled:
+            tracer.begin("check_events")
+        index_refreshed = False
         for event in events:
+            if event.type in self.pointer_listeners:
+                if not index_refreshed:
+                    self.refresh_pointer_index()
+                    index_refreshed = True
+                self.dispatch_pointer_event(event)
             if event.type in self.listeners:
-                for listener in self.listeners[event.type]:
+                for listener in list(self.listeners[event.type].values()):
                     listener.events(event)
+        if tracer.enabled:
+            tracer.end("check_events")
+
+    def refresh_pointer_index(self) -> None:
+        """
+        Moves the pointer listeners whose rects on the screen changed since the last refresh, e.g. after the camera moved
+        :return: None
+        """
+        index = self.pointer_index
+        for key, obj in self.pointer_objects.items():
+            rect = get_pointer_rect(obj)
+            if rect is None:
+                index.remove(obj)
+            elif index.rects.get(key) != rect:
+                index.move(obj, rect)
+
+    def dispatch_pointer_event(self, event: pygame.event.Event) -> None:
+        """
+        Sends the pointer event to the objects under the cursor, topmost first, until one of them consumes it.
+        Objects that got the previous MOUSEMOTION also get the next one, so they can notice the cursor left them.
+        :param event: pointer event
+        :return: None
+        """
+        listeners = self.pointer_listeners[event.type]
+        targets = [obj for obj in self.pointer_index.query_point(event.pos) if id(obj) in listeners]
+        targets.sort(key=self.pointer_priority, reverse=True)
+        if event.type == pygame.MOUSEMOTION:
+            left = [obj for obj in self.motion_targets if obj not in targets]
+            self.motion_targets = targets
+            for obj in left:
+                if id(obj) in listeners:
+                    obj.events(event)
+        for obj in targets:
+            if id(obj) in listeners and obj.events(event):
+                break
+
+    def pointer_priority(self, obj: "SupportsEvents") -> tuple[int, int]:
+        """
+        Returns the sorting key of the pointer listener, objects drawn later have the higher priority
+        :param obj: pointer listener
+        :return: layer and subscription order of the object
+        """
+        return getattr(obj, 'layer', 0), self.subscription_order.get(id(obj), 0)
+
+
+class HoverManager:
+    """
+    Class used to notify objects when the mouse cursor enters or leaves them.
+    Hover state is computed once per frame from the final mouse position,
+    and only the objects whose state changed get on_hover_enter() or on_hover_leave() called.
+    Rects of the objects are checked only when the camera moved or refresh() was called,
+    so subscribed objects that move have to call refresh() or DrawableObject.mark_dirty().
+    """
+    def __init__(self):
+        self.objects: dict[int, SupportsHover] = {}  # id(obj) -> obj of every subscribed object
+        self.hovered: dict[int, SupportsHover] = {}  # id(obj) -> obj of the objects under the cursor
+        self.index: spatial.SpatialHash = spatial.SpatialHash(const.SPATIAL_CELL_SIZE)
+        self.mouse_pos: Optional[tuple[int, int]] = None
+        self.camera_offset: tuple[int, int] = (0, 0)  # Camera offset of the last update
+        self.changed: bool = False  # Some subscribed object moved since the last update
+
+    def subscribe(self, obj: "SupportsHover") -> None:
+        """
+        Method that adds object for which the hover manager should check hovering
+        :param obj: object with rect, on_hover_enter() and on_hover_leave()
+        :return: None
+        """
+        self.objects[id(obj)] = obj
+        self.changed = True  # Index the new object on the next update
+
+    def unsubscribe(self, obj: "SupportsHover") -> None:
+        """
+        Method that removes object from hover checking, on_hover_leave() is not called
+        :param obj: object to remove
+        :return: None
+        """
+        if self.objects.pop(id(obj), None) is not None:
+            self.hovered.pop(id(obj), None)
+            self.index.remove(obj)
+
+    def refresh(self, obj: "SupportsHover") -> None:
+        """
+        Makes the next update check the rects again, call it after moving the subscribed object
+        :param obj: object that moved
+        :return: None
+        """
+        if id(obj) in self.objects:
+            self.changed = True
+
+    def is_hovered(self, obj: "SupportsHover") -> bool:
+        """
+        Checks whether the object was under the cursor at the last update
+        :param obj: subscribed object
+        :return: True if the object is hovered
+        """
+        return id(obj) in self.hovered
+
+    def update(self, mouse_pos: tuple[int, int], camera_offset: tuple[int, int] = (0, 0)) -> None:
+        """
+        Method that finds the objects under the cursor and notifies the ones that were entered or left
+        :param mouse_pos: position of the mouse cursor
+        :param camera_offset: offset of the camera, objects in the world move on the screen when it changes
+        :return: None
+        """
+        moved = False
+        index = self.index
+        if self.changed or camera_offset != self.camera_offset:
+            self.camera_offset = camera_offset
+            self.changed = False
+            for key, obj in self.objects.items():
+                rect = get_pointer_rect(obj)
+                if rect is None:
+                    if key in index.objects:
+                        index.remove(obj)
+                        moved = True
+                elif index.rects.get(key) != rect:
+                    index.move(obj, rect)
+                    moved = True
+        if not moved and mouse_pos == self.mouse_pos:
+            return
+        self.mouse_pos = mouse_pos
+
+        current = {id(obj): obj for obj in index.query_point(mouse_pos)}
+        left = [obj for key, obj in self.hovered.items() if key not in current]
+        entered = [obj for key, obj in current.items() if key not in self.hovered]
+        self.hovered = current
+        for obj in left:
+            obj.on_hover_leave()
+        for obj in entered:
+            if id(obj) in self.objects:
+                obj.on_hover_enter()
 
 
 class GameObject:
     """
     Class used to represent the basic game object
     """
+    layer: int = 0  # Objects with the lower layer get updated and rendered first
+
     def __init__(self):
         self.program: game.Game = const.program
         self.name: Optional[str] = None
@@ -273,18 +879,52 @@ class GameObject:
         """
         pass
 
+    def on_add(self) -> None:
+        """
+        Method called after the object has been stored in the ObjectManager
+        :return: None
+        """
+        pass
+
+    def on_remove(self) -> None:
+        """
+        Method called after the object has been removed from the ObjectManager
+        :return: None
+        """
+        pass
+
 
 class DrawableObject(GameObject):
     """
     Class used to represent the object that is drawn on the Scene
-    Requires image and rect attributes
+    Requires image and rect attributes, rect is in the world coordinates unless screen_space is set
     """
+    screen_space: bool = False  # Drawn at the rect on the screen, not moved by the camera, e.g. the UI
+    static: bool = False  # Doesn't move, indexed even if it overrides update(), call mark_dirty() after moving it
 
     def __init__(self, image: pygame.Surface = None, rect: pygame.Rect = None, layer: int = 1):
         super().__init__()
         self.image = image
         self.rect = rect
         self.layer = layer
+        # Used by the dirty render mode to find out whether the object has changed since it was last drawn
+        self.dirty: bool = False
+        self.drawn_image: Optional[pygame.Surface] = None
+        self.drawn_rect: Optional[pygame.Rect] = None
+
+    def mark_dirty(self) -> None:
+        """
+        Marks the object to be redrawn in the dirty render mode.
+        Only needed when the image is changed in place, replacing image or moving rect is detected automatically.
+        Objects that don't override update() and the ones subscribed to the HoverManager also have to call it
+        after moving, so they are found in the spatial indexes, see ObjectManager.refresh_drawable().
+        :return: None
+        """
+        self.dirty = True
+        if self.program is not None:
+            object_manager = self.program.get_object_manager()
+            object_manager.refresh_drawable(self)
+            object_manager.hover_manager.refresh(self)
 
     def render(self, screen: pygame.Surface) -> None:
         """
@@ -293,7 +933,17 @@ class DrawableObject(GameObject):
         :return: None
         """
         if self.image is not None and self.rect is not None:
-            screen.blit(self.image, self.rect)
+            screen.blit(self.image, self.get_screen_rect())
+
+    def get_screen_rect(self) -> Optional[pygame.Rect]:
+        """
+        Returns the rect of the object on the screen
+        :return: rect moved by the camera, or the rect itself for the objects in screen space
+        """
+        if self.screen_space or self.rect is None or self.program is None:
+            return self.rect
+        camera = self.program.get_object_manager().camera
+        return camera.world_to_screen(self.rect) if camera is not None else self.rect
 
 
 class ClickableObject(DrawableObject):
@@ -301,22 +951,26 @@ class ClickableObject(DrawableObject):
     Drawable object that can be clicked
     Must implement click_function()
     """
+    consume_clicks: bool = False  # Set it to True so clicks don't reach the objects below this one
+
     def __init__(self):
         super().__init__()
         self.program.get_event_manager().subscribe(pygame.MOUSEBUTTONDOWN, self)
 
-    def events(self, event: pygame.event.Event) -> None:
+    def events(self, event: pygame.event.Event) -> bool:
         """
         Method that checks whether the object was clicked
         :param event: Relevant event
-        :return: None
+        :return: True if the click should not reach the objects below
         """
         if event.type == pygame.MOUSEBUTTONDOWN:
-            if self.rect.collidepoint(event.pos):
+            if self.get_screen_rect().collidepoint(event.pos):
                 if event.button == 1:
                     self.click_function()
                 if event.button == 3:
                     self.click_function_right()
+                return self.consume_clicks
+        return False
 
     def click_function(self):
         """
@@ -335,7 +989,9 @@ class ClickableObject(DrawableObject):
 
 class Timer(GameObject):
     """
-    Class used for timer
+    Class used for timer.
+    Timer runs only while it is added to the ObjectManager, it is called by the Scheduler of the SceneManager.
+    Time is taken from Game.get_time(), so in the fixed timestep mode timers follow the simulated time.
     """
     def __init__(self, countdown: int, do: Callable, start: bool = True, loop: bool = True, first_check: bool = False):
         super().__init__()
@@ -346,6 +1002,10 @@ class Timer(GameObject):
         self.do: Callable = do
         self.loop: bool = loop
         self.first_check: bool = first_check
+        self.attached: bool = False  # True while the timer is in the ObjectManager
+        self.deadline: int = 0  # Time at which the timer calls the function
+        self.remaining: Optional[int] = None  # Time left until the deadline while the timer is paused
+        self.schedule_id: Optional[int] = None  # Set by the Scheduler while the timer is queued
         if start:
             self.start_timer()
 
@@ -355,8 +1015,10 @@ class Timer(GameObject):
         :return: None
         """
         self.running = True
-        self.current_time = pygame.time.get_ticks()
-        self.last_update = pygame.time.get_ticks()
+        self.remaining = None
+        self.current_time = self.last_update = self.program.get_time()
+        self.deadline = self.last_update + self.countdown if self.first_check else self.last_update
+        self.schedule()
 
     def stop_timer(self) -> None:
         """
@@ -364,27 +1026,152 @@ class Timer(GameObject):
         :return: None
         """
         self.running = False
+        self.remaining = None
+        self.get_scheduler().cancel(self)
 
-    def update(self) -> None:
+    def pause_timer(self) -> None:
         """
-        Checks whether the timer should call the function
+        Pause the timer, resume_timer() continues with the time that was left
         :return: None
         """
         if self.running:
-            self.current_time = pygame.time.get_ticks()
-            if self.current_time - self.last_update >= self.countdown or not self.first_check:
-                self.first_check = True
-                self.last_update = self.current_time
+            self.current_time = self.program.get_time()
+            self.remaining = max(0, self.deadline - self.current_time)
+            self.running = False
+            self.get_scheduler().cancel(self)
+
+    def resume_timer(self) -> None:
+        """
+        Resume the paused timer
+        :return: None
+        """
+        if self.remaining is not None:
+            self.running = True
+            self.current_time = self.program.get_time()
+            self.deadline = self.current_time + self.remaining
+            self.last_update = self.deadline - self.countdown
+            self.remaining = None
+            self.schedule()
+
+    def schedule(self) -> None:
+        """
+        Queues the timer in the Scheduler if it is running and added to the ObjectManager
+        :return: None
+        """
+        if self.running and self.attached:
+            self.get_scheduler().schedule(self, self.deadline)
+
+    def fire(self, now: int) -> None:
+        """
+        Calls the function, gets called by the Scheduler when the deadline has passed
+        :param now: current time in milliseconds
+        :return: None
+        """
+        self.first_check = True
+        self.current_time = self.last_update = now
+        if self.loop:
+            self.deadline = now + self.countdown
+            self.schedule()
+        else:
+            self.running = False
+        if tracer.enabled:
+            with tracer.span(f"Timer {getattr(self.do, '__qualname__', 'callback')}"):
                 self.do()
+        else:
+            self.do()
+
+    def on_add(self) -> None:
+        self.attached = True
+        self.schedule()
+
+    def on_remove(self) -> None:
+        self.attached = False
+        self.get_scheduler().cancel(self)
+
+    def get_scheduler(self) -> "Scheduler":
+        """
+        Returns the Scheduler that calls the timer
+        :return: scheduler
+        """
+        return self.program.get_manager().scheduler
 
     def get_percentage(self) -> float:
         """
         Returns the percentage of timer completion
         :return: percentage of timer completion
         """
+        if self.running:
+            self.current_time = self.program.get_time()
         return (self.current_time - self.last_update) / self.countdown
 
 
+class Scheduler:
+    """
+    Class used to call the Timers when they are due.
+    Timers are kept in a heap ordered by deadline, so every frame only the timers that are due get touched.
+    This object shouldn't be initialised, but rather used from the SceneManager.
+    """
+    def __init__(self):
+        self.queue: list[tuple[int, int, Timer]] = []  # Heap of (deadline, schedule id, timer)
+        self.schedule_count: int = 0
+        self.stale: int = 0  # Number of cancelled entries that are still in the heap
+
+    def __len__(self) -> int:
+        return len(self.queue) - self.stale
+
+    def schedule(self, timer: Timer, deadline: int) -> None:
+        """
+        Queues the timer to be fired at the deadline, replacing its previous deadline
+        :param timer: Timer
+        :param deadline: time in milliseconds
+        :return: None
+        """
+        self.cancel(timer)
+        self.schedule_count += 1
+        timer.schedule_id = self.schedule_count
+        heapq.heappush(self.queue, (deadline, self.schedule_count, timer))
+
+    def cancel(self, timer: Timer) -> None:
+        """
+        Removes the timer from the queue. Entry is left in the heap and skipped when it gets popped.
+        :param timer: Timer
+        :return: None
+        """
+        if timer.schedule_id is None:
+            return
+        timer.schedule_id = None
+        self.stale += 1
+        if self.stale > 64 and self.stale * 2 > len(self.queue):
+            self.queue = [entry for entry in self.queue if entry[2].schedule_id == entry[1]]
+            heapq.heapify(self.queue)
+            self.stale = 0
+
+    def clear(self) -> None:
+        """
+        Removes all timers from the queue
+        :return: None
+        """
+        for _, schedule_id, timer in self.queue:
+            if timer.schedule_id == schedule_id:
+                timer.schedule_id = None
+        self.queue = []
+        self.stale = 0
+
+    def update(self, now: int) -> None:
+        """
+        Fires all timers whose deadline has passed
+        :param now: current time in milliseconds
+        :return: None
+        """
+        while self.queue and self.queue[0][0] <= now:
+            _, schedule_id, timer = heapq.heappop(self.queue)
+            if timer.schedule_id != schedule_id:
+                self.stale -= 1
+                continue
+            timer.schedule_id = None
+            timer.fire(now)
+
+
 # Helper functions
 def layer_sort_key(x: GameObject) -> int:
     """
@@ -392,4 +1179,32 @@ def layer_sort_key(x: GameObject) -> int:
     :param x: GameObject
     :return: GameObject layer
     """
-    return x.layer if hasattr(x, 'layer') else 0
\ No newline at end of file
+    return x.layer
+
+
+def merge_rects(rects: Iterable[pygame.Rect]) -> list[pygame.Rect]:
+    """
+    Function used to join the overlapping rects, so no area is redrawn twice
+    :param rects: rects to join, they aren't changed
+    :return: new list of rects that don't overlap each other
+    """
+    merged: list[pygame.Rect] = []
+    for rect in rects:
+        rect = rect.copy()
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+def get_pointer_rect(obj: Any) -> Optional[pygame.Rect]:
+    """
+    Function used to get the area of the screen where the object reacts to the mouse.
+    DrawableObjects in the world are moved by the camera, other objects are treated as if they were in screen space.
+    :param obj: object with rect
+    :return: rect on the screen
+    """
+    get_screen_rect = getattr(obj, 'get_screen_rect', None)
+    return get_screen_rect() if get_screen_rect is not None else obj.rect
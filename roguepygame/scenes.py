@@ -9,6 +9,8 @@ class MainMenu(root.Scene):
     """
     Main menu scene. First scene that gets run after you start the game.
     """
+    dirty_render = True
+    asset_manifest = ("BUTTON",)
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -19,15 +21,14 @@ class MainMenu(root.Scene):
         self.object_manager.object_update()
 
     def render(self, screen: pygame.Surface) -> None:
-        screen.fill("LIGHTGRAY")  # Place for the background
-        self.object_manager.object_render(screen)
+        self.object_manager.object_render(screen, self.render_background)
 
     def start_game_button_click(self) -> None:
         """
         Method that gets called when the player press the New game button
         :return: None
         """
-        self.program.get_manager().go_to(GameScene)
+        self.program.get_manager().load_and_go_to(GameScene)
 
 
 class GameScene(root.Scene):
@@ -38,15 +39,14 @@ class GameScene(root.Scene):
         super().__init__(**kwargs)
         ui.Text('Game', (const.WIDTH // 2, const.HEIGHT // 2), 48)
         self.timer = root.Timer(1000, self.spawn_unit).add_object()
-        self.counter = ui.Text('', (const.WIDTH // 2, const.HEIGHT // 2 + 50), 48)
+        self.counter = ui.ValueText('Objects on screen: ', (const.WIDTH // 2, const.HEIGHT // 2 + 50), 48)
 
     def update(self):
-        self.counter.update_text(f'Objects on screen: {len(self.program.get_object_manager().objects)}')
+        self.counter.set_value(self.object_manager.object_count)
         self.object_manager.object_update()
 
     def render(self, screen):
-        screen.fill("LIGHTGRAY")  # Place for the background
-        self.object_manager.object_render(screen)
+        self.object_manager.object_render(screen, self.render_background)
 
     def spawn_unit(self) -> None:
         """
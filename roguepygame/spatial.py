@@ -0,0 +1,126 @@
+from typing import Any, Iterator
+
+import pygame
+
+
+class SpatialHash:
+    """
+    Uniform grid that indexes objects by their rects.
+    It gives the ability to find the objects at a point or in an area without checking every object.
+    """
+    def __init__(self, cell_size: int = 64):
+        self.cell_size: int = cell_size
+        self.cells: dict[tuple[int, int], dict[int, Any]] = {}  # (column, row) -> {id(obj): obj}
+        self.objects: dict[int, Any] = {}  # id(obj) -> obj
+        self.rects: dict[int, pygame.Rect] = {}  # id(obj) -> rect the object is indexed with
+        self.ranges: dict[int, tuple[int, int, int, int]] = {}  # id(obj) -> cell range of the indexed rect
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def __contains__(self, obj: Any) -> bool:
+        return id(obj) in self.objects
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(list(self.objects.values()))
+
+    def cell_range(self, rect: pygame.Rect) -> tuple[int, int, int, int]:
+        """
+        Returns the range of the cells the rect covers
+        :param rect: area
+        :return: first column, first row, last column, last row
+        """
+        x, y, w, h = rect
+        size = self.cell_size
+        return x // size, y // size, (x + max(w, 1) - 1) // size, (y + max(h, 1) - 1) // size
+
+    def insert(self, obj: Any, rect: pygame.Rect) -> None:
+        """
+        Adds the object to the cells covered by the rect
+        :param obj: object to index
+        :param rect: area of the object
+        :return: None
+        """
+        key = id(obj)
+        if key in self.objects:
+            self.remove(obj)
+        self.objects[key] = obj
+        self.rects[key] = pygame.Rect(rect)
+        x0, y0, x1, y1 = self.ranges[key] = self.cell_range(rect)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                cell = self.cells.get((x, y))
+                if cell is None:
+                    cell = self.cells[(x, y)] = {}
+                cell[key] = obj
+
+    def remove(self, obj: Any) -> None:
+        """
+        Removes the object from the index, does nothing if the object isn't indexed
+        :param obj: indexed object
+        :return: None
+        """
+        key = id(obj)
+        if self.objects.pop(key, None) is None:
+            return
+        del self.rects[key]
+        x0, y0, x1, y1 = self.ranges.pop(key)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                cell = self.cells[(x, y)]
+                del cell[key]
+                if not cell:
+                    del self.cells[(x, y)]
+
+    def move(self, obj: Any, rect: pygame.Rect) -> None:
+        """
+        Updates the area of the object, cells are only changed if the rect moved to another cell
+        :param obj: object to move
+        :param rect: new area of the object
+        :return: None
+        """
+        key = id(obj)
+        old_rect = self.rects.get(key)
+        if old_rect is None:
+            self.insert(obj, rect)
+        elif old_rect != rect:
+            if self.ranges[key] == self.cell_range(rect):
+                old_rect.update(rect)
+            else:
+                self.insert(obj, rect)
+
+    def query_point(self, pos: tuple[int, int]) -> list[Any]:
+        """
+        Returns the objects whose indexed rect contains the point
+        :param pos: point
+        :return: list of objects
+        """
+        cell = self.cells.get((int(pos[0]) // self.cell_size, int(pos[1]) // self.cell_size))
+        if cell is None:
+            return []
+        return [obj for key, obj in cell.items() if self.rects[key].collidepoint(pos)]
+
+    def query_rect(self, rect: pygame.Rect) -> list[Any]:
+        """
+        Returns the objects whose indexed rect collides with the area
+        :param rect: area
+        :return: list of objects, every object is returned once
+        """
+        return list(self.query_rect_ids(rect).values())
+
+    def query_rect_ids(self, rect: pygame.Rect) -> dict[int, Any]:
+        """
+        Returns the objects whose indexed rect collides with the area, keyed by their ids
+        :param rect: area
+        :return: dict id(obj) -> obj
+        """
+        found: dict[int, Any] = {}
+        x0, y0, x1, y1 = self.cell_range(rect)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                cell = self.cells.get((x, y))
+                if cell is not None:
+                    found.update(cell)
+        rects = self.rects
+        collides = rect.colliderect
+        return {key: obj for key, obj in found.items() if collides(rects[key])}
@@ -0,0 +1,162 @@
+from array import array
+from typing import Iterable, Optional
+
+import pygame
+import constants as const
+import root
+
+EMPTY_TILE: int = 0  # Tile id that isn't drawn
+
+
+class TileMap(root.DrawableObject):
+    """
+    Drawable object that draws a grid of tiles, like the floor and the walls of a dungeon level.
+    Tile ids are stored in a compact array('H') row by row, id is the index of the tile image.
+    Map is pre-rendered into chunks of const.TILE_CHUNK_SIZE x const.TILE_CHUNK_SIZE tiles,
+    chunk is rendered again only when one of its tiles changed, and only chunks that are on the screen are drawn.
+    Map is static, call mark_dirty() after changing its position.
+    """
+    static = True
+
+    def __init__(self, size: tuple[int, int], tile_images: list[Optional[pygame.Surface]],
+                 tile_size: int = const.TILE_SIZE, position: tuple[int, int] = (0, 0), layer: int = 0,
+                 chunk_size: int = const.TILE_CHUNK_SIZE, create_object=True):
+        super().__init__(layer=layer)
+        self.width, self.height = size  # Size of the map in tiles
+        self.tile_images: list[Optional[pygame.Surface]] = tile_images  # tile id -> image, None isn't drawn
+        self.tile_size: int = tile_size
+        self.chunk_size: int = chunk_size
+        self.tiles: array = array('H', bytes(2 * self.width * self.height))  # Tile ids, row by row
+        self.rect = pygame.Rect(position, (self.width * tile_size, self.height * tile_size))
+        self.chunks: dict[tuple[int, int], pygame.Surface] = {}  # (chunk x, chunk y) -> rendered chunk
+        self.dirty_chunks: set[tuple[int, int]] = set()  # Rendered chunks whose tiles changed
+        self.chunk_count: tuple[int, int] = (-(-self.width // chunk_size), -(-self.height // chunk_size))
+        self.drawn_chunks: int = 0  # Number of chunks drawn by the last render()
+        if create_object:
+            self.add_object()
+
+    def get_tile(self, x: int, y: int) -> int:
+        """
+        Returns the tile id
+        :param x: column of the tile
+        :param y: row of the tile
+        :return: tile id
+        """
+        return self.tiles[y * self.width + x]
+
+    def set_tile(self, x: int, y: int, tile_id: int) -> None:
+        """
+        Changes the tile, its chunk is rendered again before it is drawn
+        :param x: column of the tile
+        :param y: row of the tile
+        :param tile_id: new tile id
+        :return: None
+        """
+        index = y * self.width + x
+        if self.tiles[index] != tile_id:
+            self.tiles[index] = tile_id
+            self.invalidate(pygame.Rect(x, y, 1, 1))
+
+    def fill(self, tile_id: int, area: Optional[pygame.Rect] = None) -> None:
+        """
+        Sets all tiles in the area to the same id
+        :param tile_id: new tile id
+        :param area: area in tiles, the whole map by default
+        :return: None
+        """
+        bounds = pygame.Rect(0, 0, self.width, self.height)
+        area = bounds if area is None else bounds.clip(area)
+        if not area:
+            return
+        row = array('H', [tile_id]) * area.width
+        for y in range(area.top, area.bottom):
+            start = y * self.width + area.left
+            self.tiles[start:start + area.width] = row
+        self.invalidate(area)
+
+    def load(self, tiles: Iterable[int]) -> None:
+        """
+        Replaces all tiles of the map
+        :param tiles: width * height tile ids, row by row
+        :return: None
+        """
+        tiles = array('H', tiles)
+        if len(tiles) != len(self.tiles):
+            raise ValueError(f"Expected {len(self.tiles)} tiles, got {len(tiles)}")
+        self.tiles = tiles
+        self.invalidate(pygame.Rect(0, 0, self.width, self.height))
+
+    def invalidate(self, area: pygame.Rect) -> None:
+        """
+        Marks the chunks that overlap the area to be rendered again
+        :param area: area in tiles
+        :return: None
+        """
+        size = self.chunk_size
+        for chunk_y in range(area.top // size, (area.bottom - 1) // size + 1):
+            for chunk_x in range(area.left // size, (area.right - 1) // size + 1):
+                if (chunk_x, chunk_y) in self.chunks:
+                    self.dirty_chunks.add((chunk_x, chunk_y))
+        self.mark_dirty()
+
+    def render_chunk(self, chunk_x: int, chunk_y: int) -> pygame.Surface:
+        """
+        Draws the tiles of the chunk on its Surface, the Surface is created the first time
+        :param chunk_x: column of the chunk
+        :param chunk_y: row of the chunk
+        :return: chunk Surface
+        """
+        size, tile_size = self.chunk_size, self.tile_size
+        left, top = chunk_x * size, chunk_y * size
+        columns, rows = min(size, self.width - left), min(size, self.height - top)
+        chunk = self.chunks.get((chunk_x, chunk_y))
+        if chunk is None:
+            chunk = pygame.Surface((columns * tile_size, rows * tile_size), pygame.SRCALPHA).convert_alpha()
+            self.chunks[(chunk_x, chunk_y)] = chunk
+        else:
+            chunk.fill((0, 0, 0, 0))
+        images, tiles, width = self.tile_images, self.tiles, self.width
+        sequence = []
+        for row in range(rows):
+            start = (top + row) * width + left
+            for column, tile_id in enumerate(tiles[start:start + columns]):
+                image = images[tile_id]
+                if image is not None:
+                    sequence.append((image, (column * tile_size, row * tile_size)))
+        chunk.blits(sequence, False)
+        self.dirty_chunks.discard((chunk_x, chunk_y))
+        return chunk
+
+    def get_visible_chunks(self, map_rect: pygame.Rect, view: pygame.Rect) -> Iterable[tuple[int, int]]:
+        """
+        Returns the chunks that overlap the area of the screen
+        :param map_rect: area of the whole map on the screen
+        :param view: area of the screen
+        :return: (chunk x, chunk y) of the chunks
+        """
+        area = map_rect.clip(view)
+        if not area:
+            return ()
+        chunk_pixels = self.chunk_size * self.tile_size
+        left, top = (area.left - map_rect.left) // chunk_pixels, (area.top - map_rect.top) // chunk_pixels
+        right = (area.right - 1 - map_rect.left) // chunk_pixels
+        bottom = (area.bottom - 1 - map_rect.top) // chunk_pixels
+        return ((x, y) for y in range(top, bottom + 1) for x in range(left, right + 1))
+
+    def render(self, screen: pygame.Surface) -> None:
+        """
+        Draws the chunks inside the clip area of the screen, renders the chunks that changed first
+        :param screen: game window
+        :return: None
+        """
+        chunk_pixels = self.chunk_size * self.tile_size
+        map_rect = self.get_screen_rect()
+        left, top = map_rect.topleft
+        sequence = []
+        for chunk_x, chunk_y in self.get_visible_chunks(map_rect, screen.get_clip()):
+            chunk = self.chunks.get((chunk_x, chunk_y))
+            if chunk is None or (chunk_x, chunk_y) in self.dirty_chunks:
+                chunk = self.render_chunk(chunk_x, chunk_y)
+            sequence.append((chunk, (left + chunk_x * chunk_pixels, top + chunk_y * chunk_pixels)))
+        screen.blits(sequence, False)
+        self.drawn_chunks = len(sequence)
@@ -0,0 +1,148 @@
+import json
+import os
+import time
+from array import array
+from contextlib import contextmanager
+from typing import Iterator
+
+import constants as const
+
+# Event types of the Chrome trace event format
+BEGIN, END, COMPLETE = range(3)
+PHASE_CODES: tuple[str, ...] = ('B', 'E', 'X')
+
+
+class Tracer:
+    """
+    Class used to record the timeline of the game and save it as the Chrome trace event JSON,
+    which can be opened in Perfetto (https://ui.perfetto.dev) or chrome://tracing.
+    Events are stored in buffers allocated when the recording starts, so recording doesn't allocate memory.
+    When the buffers are full new events are dropped.
+    Use the tracer object of this module instead of creating a new one.
+    """
+    def __init__(self, capacity: int = const.TRACE_CAPACITY):
+        self.capacity: int = capacity
+        # Buffers are allocated by the first start()
+        self.kinds: array = array('b')
+        self.name_ids: array = array('i')
+        self.timestamps: array = array('q')  # Nanoseconds
+        self.durations: array = array('q')  # Nanoseconds, only for COMPLETE events
+        self.count: int = 0
+        self.dropped: int = 0
+        self.names: list[str] = []
+        self.name_lookup: dict[str, int] = {}
+        self.enabled: bool = False
+
+    def start(self) -> None:
+        """
+        Clears the recorded events and starts recording
+        :return: None
+        """
+        if len(self.kinds) != self.capacity:
+            self.kinds = array('b', bytes(self.capacity))
+            self.name_ids = array('i', bytes(4 * self.capacity))
+            self.timestamps = array('q', bytes(8 * self.capacity))
+            self.durations = array('q', bytes(8 * self.capacity))
+        self.count = 0
+        self.dropped = 0
+        self.enabled = True
+
+    def stop(self) -> None:
+        """
+        Stops recording
+        :return: None
+        """
+        self.enabled = False
+
+    def get_name_id(self, name: str) -> int:
+        """
+        Returns the index of the name in the name table, adds the name if it isn't there
+        :param name: name of the span
+        :return: index of the name
+        """
+        name_id = self.name_lookup.get(name)
+        if name_id is None:
+            name_id = self.name_lookup[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def record(self, kind: int, name: str, timestamp: int, duration: int = 0) -> None:
+        """
+        Stores the event in the buffers
+        :param kind: BEGIN, END or COMPLETE
+        :param name: name of the span
+        :param timestamp: time.perf_counter_ns() of the event
+        :param duration: duration of the COMPLETE event in nanoseconds
+        :return: None
+        """
+        if self.count == self.capacity:
+            self.dropped += 1
+            return
+        self.kinds[self.count] = kind
+        self.name_ids[self.count] = self.get_name_id(name)
+        self.timestamps[self.count] = timestamp
+        self.durations[self.count] = duration
+        self.count += 1
+
+    def begin(self, name: str) -> None:
+        """
+        Starts the span, every begin() must be followed by end() with the same name
+        :param name: name of the span
+        :return: None
+        """
+        if self.enabled:
+            self.record(BEGIN, name, time.perf_counter_ns())
+
+    def end(self, name: str) -> None:
+        """
+        Ends the span started by begin()
+        :param name: name of the span
+        :return: None
+        """
+        if self.enabled:
+            self.record(END, name, time.perf_counter_ns())
+
+    def complete(self, name: str, start: int, duration: int) -> None:
+        """
+        Records the span that has already finished
+        :param name: name of the span
+        :param start: time.perf_counter_ns() at the start of the span
+        :param duration: duration in nanoseconds
+        :return: None
+        """
+        if self.enabled:
+            self.record(COMPLETE, name, start, duration)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """
+        Context manager that records the code inside of it as a span, meant for code that doesn't run every frame
+        :param name: name of the span
+        :return: None
+        """
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def write(self, path: str) -> None:
+        """
+        Writes the recorded events to the Chrome trace event JSON file
+        :param path: path of the file
+        :return: None
+        """
+        events = []
+        pid = os.getpid()
+        for i in range(self.count):
+            event = {'name': self.names[self.name_ids[i]], 'ph': PHASE_CODES[self.kinds[i]],
+                     'ts': self.timestamps[i] / 1000, 'pid': pid, 'tid': 1}
+            if self.kinds[i] == COMPLETE:
+                event['dur'] = self.durations[i] / 1000
+            events.append(event)
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                       'otherData': {'dropped_events': self.dropped}}, file)
+
+
+tracer = Tracer()
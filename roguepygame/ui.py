@@ -1,25 +1,33 @@
-from typing import Callable
+from typing import Callable, Optional
 
 import pygame
-import constants as const
 import root
+import fonts
 from enums import ButtonStates
 
+# Characters of the numeric values, ValueText puts them in the glyph atlas up front
+VALUE_CHARACTERS: str = '0123456789+-.,:/% '
+DIGITS: str = '0123456789'  # Characters that ValueText draws in cells of the same width
+
 
 class Text(root.DrawableObject):
     """
     Text element class
     """
+    screen_space = True
+
     def __init__(self, text: str, position: tuple[int, int], size: int = 20,
                  color: pygame.Color = pygame.Color("BLACK"), allign: str = "center",
-                 create_object=True):
+                 create_object=True, use_glyph_atlas: bool = False):
         super().__init__()
         self.text: str = text
         self.position: tuple[int, int] = position
         self.size: int = size
         self.color: pygame.Color = color
         self.allign: str = allign
-        self.font: pygame.font.Font = pygame.font.Font(const.FONT_NAME, size)
+        self.font: pygame.font.Font = fonts.get_font(size)
+        # Compose the text from cached glyphs instead of rendering it, good for many short changing labels
+        self.glyph_atlas: Optional[fonts.GlyphAtlas] = fonts.get_glyph_atlas(self.font, color) if use_glyph_atlas else None
         self.create_surface()
         if create_object:
             self.add_object()
@@ -29,7 +37,10 @@ class Text(root.DrawableObject):
         Creates the Surface object for the text
         :return: None
         """
-        self.image = self.font.render(self.text, True, self.color)
+        if self.glyph_atlas is not None:
+            self.image = self.glyph_atlas.render(self.text)
+        else:
+            self.image = fonts.render_text(self.font, self.text, self.color)
         self.rect = self.image.get_rect(**{self.allign: self.position})
 
     def update_text(self, new_text: str) -> None:
@@ -43,10 +54,102 @@ class Text(root.DrawableObject):
             self.create_surface()
 
 
+class ValueText(root.DrawableObject):
+    """
+    Text element for the values that change often, like HP, gold or counters.
+    Prefix is rendered once and the characters of the value are taken from the glyph atlas shared by the fonts module,
+    so changing the value doesn't render or draw anything, the glyphs are blitted straight to the screen.
+    Digits get cells of the same width, so the value doesn't jiggle when it changes, like the tabular figures.
+    """
+    screen_space = True
+
+    def __init__(self, prefix: str, position: tuple[int, int], size: int = 20,
+                 color: pygame.Color = pygame.Color("BLACK"), allign: str = "center", create_object=True):
+        super().__init__()
+        self.prefix: str = prefix
+        self.position: tuple[int, int] = position
+        self.color: pygame.Color = color
+        self.allign: str = allign
+        self.font: pygame.font.Font = fonts.get_font(size)
+        self.glyph_atlas: fonts.GlyphAtlas = fonts.get_glyph_atlas(self.font, color)
+        for character in VALUE_CHARACTERS:
+            if character not in self.glyph_atlas.glyphs:
+                self.glyph_atlas.add_glyph(character)
+        self.digit_width: int = max(self.glyph_atlas.glyphs[digit].width for digit in DIGITS)
+        self.image = fonts.render_text(self.font, prefix, color)  # Prefix, the value is drawn by render()
+        self.text: str = ''
+        self.update_rect()
+        if create_object:
+            self.add_object()
+
+    def get_advance(self, character: str) -> int:
+        """
+        Returns how far the next character is from the character
+        :param character: single character of the value
+        :return: width in pixels
+        """
+        if character in DIGITS:
+            return self.digit_width
+        area = self.glyph_atlas.glyphs.get(character)
+        return area.width if area is not None else self.glyph_atlas.add_glyph(character).width
+
+    def update_rect(self) -> None:
+        """
+        Places the rect of the prefix and the value at the position, the rect is as wide as the drawn text
+        :return: None
+        """
+        width = self.image.get_width() + sum(self.get_advance(character) for character in self.text)
+        self.rect = pygame.Rect(0, 0, width, self.image.get_height())
+        setattr(self.rect, self.allign, self.position)
+
+    def update_text(self, new_text: str) -> None:
+        """
+        Function that changes the value
+        :param new_text: new value
+        :return: None
+        """
+        if new_text == self.text:
+            return
+        self.text = new_text
+        self.update_rect()
+        self.mark_dirty()
+
+    def set_value(self, value: object) -> None:
+        """
+        Function that changes the value
+        :param value: new value, converted with str()
+        :return: None
+        """
+        self.update_text(str(value))
+
+    def render(self, screen: pygame.Surface) -> None:
+        """
+        Draws the prefix and the glyphs of the value, digits are centered in their cells
+        :param screen: game window
+        :return: None
+        """
+        x, y = self.get_screen_rect().topleft
+        glyph_atlas = self.glyph_atlas
+        sheet, glyphs, digit_width = glyph_atlas.sheet, glyph_atlas.glyphs, self.digit_width
+        sequence = [(self.image, (x, y))]
+        x += self.image.get_width()
+        for character in self.text:
+            area = glyphs[character]  # Added by update_rect()
+            if character in DIGITS:
+                sequence.append((sheet, (x + (digit_width - area.width) // 2, y), area))
+                x += digit_width
+            else:
+                sequence.append((sheet, (x, y), area))
+                x += area.width
+        screen.blits(sequence, False)
+
+
 class Button(root.ClickableObject):
     """
     Button class
     """
+    screen_space = True
+
     def __init__(self, text: str, position: tuple[int, int], do: Callable, active: bool=True):
         super().__init__()
         self.state: ButtonStates = ButtonStates.ACTIVE if active else ButtonStates.INACTIVE
@@ -54,8 +157,7 @@ class Button(root.ClickableObject):
         self.image = self.images[self.state.value]
         self.rect = self.image.get_rect(**{'center': position})
         self.do: Callable = do
-        if active:
-            self.program.get_event_manager().subscribe(pygame.MOUSEMOTION, self)
+        self.program.get_hover_manager().subscribe(self)
         self.add_child(Text(text, self.rect.center, 24, create_object=False))
         self.add_object()
 
@@ -64,14 +166,10 @@ class Button(root.ClickableObject):
         Check if button is hovered
         :return: None
         """
-        if self.state != ButtonStates.INACTIVE:
-            mouse_pos = self.program.get_scene().state['mouse_pos']
-            if self.state == ButtonStates.ACTIVE:
-                if self.rect.collidepoint(mouse_pos):
-                    self.set_state(ButtonStates.HOVERED)
-            elif self.state == ButtonStates.HOVERED:
-                if not self.rect.collidepoint(mouse_pos):
-                    self.set_state(ButtonStates.ACTIVE)
+        if self.program.get_hover_manager().is_hovered(self):
+            self.on_hover_enter()
+        else:
+            self.on_hover_leave()
 
     def set_activity(self, active: bool) -> None:
         """
@@ -80,10 +178,8 @@ class Button(root.ClickableObject):
         :return: None
         """
         if self.state == ButtonStates.ACTIVE and not active:
-            self.program.get_event_manager().unsubscribe(pygame.MOUSEMOTION, self)
             self.set_state(ButtonStates.INACTIVE)
         elif self.state == ButtonStates.INACTIVE and active:
-            self.program.get_event_manager().subscribe(pygame.MOUSEMOTION, self)
             self.set_state(ButtonStates.ACTIVE)
             self.check_state()
 
@@ -97,10 +193,21 @@ class Button(root.ClickableObject):
         self.state = state
         self.image = self.images[self.state.value]
 
-    def events(self, event: pygame.event.Event) -> None:
-        super().events(event)
-        if event.type == pygame.MOUSEMOTION:
-            self.check_state()
+    def on_hover_enter(self) -> None:
+        """
+        Function that gets called when the mouse cursor enters the button
+        :return: None
+        """
+        if self.state == ButtonStates.ACTIVE:
+            self.set_state(ButtonStates.HOVERED)
+
+    def on_hover_leave(self) -> None:
+        """
+        Function that gets called when the mouse cursor leaves the button
+        :return: None
+        """
+        if self.state == ButtonStates.HOVERED:
+            self.set_state(ButtonStates.ACTIVE)
 
     def click_function(self) -> None:
         """
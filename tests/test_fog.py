@@ -0,0 +1,63 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'roguepygame'))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import numpy as np
+import pygame
+import constants as const
+import fog
+import fov
+
+
+class FogOfWarTest(unittest.TestCase):
+    def setUp(self):
+        pygame.init()
+        self.screen = pygame.display.set_mode((320, 240))
+        self.size = (43, 31)
+        self.position = (-40, -20)
+        self.tile_size = 16
+        self.transparent = np.random.default_rng(0).random((self.size[1], self.size[0])) > 0.2
+        self.fog = fog.FogOfWar(self.size, self.tile_size, self.position, create_object=False)
+
+    def tearDown(self):
+        pygame.quit()
+
+    def draw_reference(self, visible: np.ndarray, explored: np.ndarray) -> pygame.Surface:
+        """
+        Draws the fog one tile at a time, the way the fog must look
+        :param visible: bool array of shape (height, width)
+        :param explored: bool array of shape (height, width)
+        :return: white Surface of the screen size with the fog drawn over it
+        """
+        surface = pygame.Surface(self.screen.get_size())
+        surface.fill('white')
+        tile = pygame.Surface((self.tile_size, self.tile_size), pygame.SRCALPHA)
+        for y in range(self.size[1]):
+            for x in range(self.size[0]):
+                if not visible[y, x]:
+                    tile.fill((*const.FOG_COLOR, const.FOG_EXPLORED_ALPHA if explored[y, x] else 255))
+                    surface.blit(tile, (self.position[0] + x * self.tile_size, self.position[1] + y * self.tile_size))
+        return surface
+
+    def test_render_matches_reference(self):
+        field_of_view = fov.FieldOfView(self.transparent, 6)
+        explored = np.zeros(self.transparent.shape, dtype=bool)
+        for origin in [(5, 5), (6, 5), (10, 8), (12, 12), (30, 12), (30, 12), (1, 1)]:
+            visible = field_of_view.update(origin)
+            self.fog.update_visible(visible)
+            explored |= visible
+            self.screen.fill('white')
+            self.fog.render(self.screen)
+            self.assertEqual(pygame.image.tobytes(self.screen, 'RGB'),
+                             pygame.image.tobytes(self.draw_reference(visible, explored), 'RGB'), f"at {origin}")
+            x, y = origin
+            self.assertTrue(self.fog.is_visible(x, y))
+            self.assertTrue(self.fog.is_explored(5, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
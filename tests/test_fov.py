@@ -0,0 +1,128 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'roguepygame'))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import numpy as np
+import benchmark
+import fov
+
+# The NumPy fov casts lines to points around the cells instead of shadowcasting, so the edges of the shadows
+# behind walls differ a bit. Differing cells are measured against the cells the reference sees,
+# 2-4% on these maps, open maps have to match exactly.
+TOLERANCE: float = 0.06
+
+
+def reference_fov(transparent: np.ndarray, origin: tuple[int, int], radius: int) -> np.ndarray:
+    """
+    Field of view of benchmark.python_shadowcast as a bool array of the map shape
+    """
+    mask = np.zeros(transparent.shape, dtype=bool)
+    for x, y in benchmark.python_shadowcast(transparent.tolist(), origin, radius):
+        mask[y, x] = True
+    return mask
+
+
+def edge_origins(width: int, height: int) -> list[tuple[int, int]]:
+    """
+    Corners and the middles of the sides of the map
+    """
+    return [(0, 0), (width - 1, 0), (0, height - 1), (width - 1, height - 1),
+            (width // 2, 0), (0, height // 2), (width - 1, height // 2), (width // 2, height - 1)]
+
+
+class FovTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.width, self.height = 40, 30
+
+    def random_map(self, walls: float) -> np.ndarray:
+        return self.rng.random((self.height, self.width)) >= walls
+
+    def random_origins(self, count: int) -> list[tuple[int, int]]:
+        xs, ys = self.rng.integers(self.width, size=count), self.rng.integers(self.height, size=count)
+        return [(int(x), int(y)) for x, y in zip(xs, ys)] + edge_origins(self.width, self.height)
+
+    def test_open_map_matches_reference(self):
+        transparent = np.ones((self.height, self.width), dtype=bool)
+        for radius in (1, 3, 8):
+            for origin in self.random_origins(10):
+                np.testing.assert_array_equal(fov.compute_fov(transparent, origin, radius),
+                                              reference_fov(transparent, origin, radius), f'{origin} r{radius}')
+
+    def test_walled_maps_match_reference_within_tolerance(self):
+        for walls in (0.1, 0.3, 0.5):
+            differing = seen = 0
+            for _ in range(5):
+                transparent = self.random_map(walls)
+                for radius in (2, 4, 8):
+                    for origin in self.random_origins(10):
+                        transparent[origin[1], origin[0]] = True
+                        mask = fov.compute_fov(transparent, origin, radius)
+                        expected = reference_fov(transparent, origin, radius)
+                        self.assertTrue(mask[origin[1], origin[0]])
+                        differing += np.count_nonzero(mask != expected)
+                        seen += np.count_nonzero(expected)
+            self.assertLessEqual(differing / seen, TOLERANCE, f'walls {walls}')
+
+    def test_nothing_outside_the_radius_is_visible(self):
+        transparent = np.ones((self.height, self.width), dtype=bool)
+        ys, xs = np.mgrid[:self.height, :self.width]
+        for origin in self.random_origins(5):
+            mask = fov.compute_fov(transparent, origin, 5)
+            distance = (xs - origin[0]) ** 2 + (ys - origin[1]) ** 2
+            self.assertFalse(mask[distance > 5 * 6].any())
+
+    def test_batch_matches_single_viewer(self):
+        transparent = self.random_map(0.3)
+        radius = 6
+        origins = self.random_origins(20)
+        windows = fov.compute_fov_batch(transparent, origins, radius)
+        self.assertEqual(windows.shape, (len(origins), 2 * radius + 1, 2 * radius + 1))
+        for window, origin in zip(windows, origins):
+            mask = fov.compute_fov(transparent, origin, radius)
+            x, y = origin
+            top, left = max(0, y - radius), max(0, x - radius)
+            inside = window[top - y + radius:min(self.height, y + radius + 1) - y + radius,
+                            left - x + radius:min(self.width, x + radius + 1) - x + radius]
+            np.testing.assert_array_equal(inside, mask[top:y + radius + 1, left:x + radius + 1], f'{origin}')
+            self.assertEqual(np.count_nonzero(window), np.count_nonzero(mask), f'{origin} sees outside the map')
+
+    def test_field_of_view_follows_moving_viewer(self):
+        transparent = self.random_map(0.3)
+        field_of_view = fov.FieldOfView(transparent, 8)
+        for origin in self.random_origins(20):
+            np.testing.assert_array_equal(field_of_view.update(origin), fov.compute_fov(transparent, origin, 8))
+
+    def test_set_transparent_matches_fresh_calculation(self):
+        transparent = self.random_map(0.3)
+        radius = 5
+        field_of_view = fov.FieldOfView(transparent, radius)
+        for origin in [(self.width // 2, self.height // 2)] + edge_origins(self.width, self.height):
+            field_of_view.update(origin)
+            for _ in range(20):
+                x = int(np.clip(origin[0] + self.rng.integers(-radius, radius + 1), 0, self.width - 1))
+                y = int(np.clip(origin[1] + self.rng.integers(-radius, radius + 1), 0, self.height - 1))
+                transparent[y, x] = not transparent[y, x]
+                field_of_view.set_transparent(x, y, bool(transparent[y, x]))
+                np.testing.assert_array_equal(field_of_view.update(origin),
+                                              fov.compute_fov(transparent, origin, radius), f'{origin} ({x}, {y})')
+
+    def test_set_transparent_out_of_range_doesnt_recompute(self):
+        transparent = np.ones((self.height, self.width), dtype=bool)
+        field_of_view = fov.FieldOfView(transparent, 4)
+        field_of_view.update((0, 0))
+        computed = field_of_view.computed
+        field_of_view.set_transparent(self.width - 1, self.height - 1, False)
+        field_of_view.update((0, 0))
+        self.assertEqual(field_of_view.computed, computed)
+        transparent[self.height - 1, self.width - 1] = False
+        np.testing.assert_array_equal(field_of_view.update((self.width - 1, self.height - 2)),
+                                      fov.compute_fov(transparent, (self.width - 1, self.height - 2), 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'roguepygame'))
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+import constants as const
+import root
+
+
+class Program:
+    """
+    Smallest part of the Game the ObjectManager and the GameObjects use
+    """
+    def __init__(self):
+        const.program = self
+        self.object_manager = root.ObjectManager()
+
+    def get_object_manager(self) -> root.ObjectManager:
+        return self.object_manager
+
+
+class Recorder(root.GameObject):
+    """
+    Object that writes its name to the log when it is updated and runs the action if it has one
+    """
+    def __init__(self, name: str, log: list[str], action=None):
+        super().__init__()
+        self.name = name
+        self.log = log
+        self.action = action
+
+    def update(self) -> None:
+        self.log.append(self.name)
+        if self.action is not None:
+            self.action()
+
+
+class Walker(root.DrawableObject):
+    """
+    DrawableObject that moves by itself in update()
+    """
+    def __init__(self, image: pygame.Surface, rect: pygame.Rect, step: tuple[int, int]):
+        super().__init__(image, rect)
+        self.step = step
+
+    def update(self) -> None:
+        self.rect.move_ip(self.step)
+
+
+class ObjectManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.program = Program()
+        self.manager = self.program.object_manager
+        self.log: list[str] = []
+
+    def tearDown(self):
+        const.program = None
+
+    def test_destroy_during_update_doesnt_skip_next_object(self):
+        first = Recorder('first', self.log)
+        first.action = first.destroy_object
+        first.add_object()
+        Recorder('second', self.log).add_object()
+        Recorder('third', self.log).add_object()
+        self.manager.object_update()
+        self.assertEqual(self.log, ['first', 'second', 'third'])
+        self.assertFalse(self.manager.has_object(first))
+        self.log.clear()
+        self.manager.object_update()
+        self.assertEqual(self.log, ['second', 'third'])
+
+    def test_destroying_other_object_is_applied_after_the_pass(self):
+        second = Recorder('second', self.log)
+        Recorder('first', self.log, lambda: second.destroy_object()).add_object()
+        second.add_object()
+        self.manager.object_update()
+        self.assertEqual(self.log, ['first', 'second'])
+        self.assertFalse(self.manager.has_object(second))
+
+    def test_object_added_during_update_is_updated_from_next_pass(self):
+        added = Recorder('added', self.log)
+        Recorder('first', self.log, added.add_object).add_object()
+        self.manager.object_update()
+        self.assertEqual(self.log, ['first'])
+        self.assertTrue(self.manager.has_object(added))
+        self.log.clear()
+        self.manager.object_update()
+        self.assertEqual(self.log, ['first', 'added'])
+
+    def test_queued_commands_are_applied_in_order(self):
+        target = Recorder('target', self.log)
+
+        def toggle():
+            target.add_object()
+            target.destroy_object()
+            target.add_object()
+        Recorder('first', self.log, toggle).add_object()
+        self.manager.object_update()
+        self.assertTrue(self.manager.has_object(target))
+        self.assertEqual(self.manager.object_count, 2)
+
+    def test_remove_twice_is_safe(self):
+        obj = Recorder('obj', self.log)
+        obj.add_object()
+        Recorder('first', self.log, lambda: (obj.destroy_object(), obj.destroy_object())).add_object()
+        self.manager.object_update()
+        obj.destroy_object()
+        self.assertEqual(self.manager.object_count, 1)
+
+    def test_clear_objects_during_update(self):
+        added = Recorder('added', self.log)
+
+        def clear():
+            added.add_object()
+            self.manager.clear_objects()
+        Recorder('first', self.log, clear).add_object()
+        Recorder('second', self.log).add_object()
+        self.manager.object_update()
+        self.assertEqual(self.log, ['first', 'second'])
+        self.assertEqual(self.manager.object_count, 0)
+        self.assertEqual(list(self.manager.iter_objects()), [])
+
+    def test_objects_are_updated_by_layer_then_insertion_order(self):
+        for name, layer in [('a', 2), ('b', 0), ('c', 2), ('d', 1)]:
+            obj = Recorder(name, self.log)
+            obj.layer = layer
+            obj.add_object()
+        self.manager.object_update()
+        self.assertEqual(self.log, ['b', 'd', 'a', 'c'])
+
+
+class CullingTest(unittest.TestCase):
+    def setUp(self):
+        self.program = Program()
+        self.manager = self.program.object_manager
+        self.rng = random.Random(0)
+        self.image = pygame.Surface((16, 16))
+
+    def tearDown(self):
+        const.program = None
+
+    def add_objects(self, count: int, world_size: int) -> list[root.DrawableObject]:
+        objects = []
+        for i in range(count):
+            rect = pygame.Rect(self.rng.randrange(world_size), self.rng.randrange(world_size), 16, 16)
+            kind = i % 4
+            if kind == 0:
+                obj = root.DrawableObject(self.image, rect, layer=self.rng.randrange(3))
+                obj.static = True
+            elif kind == 1:
+                obj = root.DrawableObject(self.image, rect, layer=self.rng.randrange(3))
+            else:
+                obj = Walker(self.image, rect, (self.rng.randrange(-20, 21), self.rng.randrange(-20, 21)))
+                obj.layer = self.rng.randrange(3)
+            obj.add_object()
+            objects.append(obj)
+        hud = root.DrawableObject(self.image, pygame.Rect(5000, 5000, 16, 16), layer=2)
+        hud.screen_space = True
+        hud.add_object()
+        root.DrawableObject(self.image, None, layer=0).add_object()
+        return objects
+
+    def expected(self, view: pygame.Rect) -> list[root.DrawableObject]:
+        return [obj for obj in self.manager.drawables
+                if obj.screen_space or obj.rect is None or obj.rect.colliderect(view)]
+
+    def test_visible_drawables_match_rect_check_after_moving(self):
+        objects = self.add_objects(800, 8000)
+        views = [pygame.Rect(0, 0, 1280, 720), pygame.Rect(3000, 2500, 1280, 720),
+                 pygame.Rect(-100, -100, 300, 300), pygame.Rect(0, 0, 8000, 8000)]
+        for _ in range(5):
+            self.manager.object_update()
+            for obj in self.rng.sample(objects, 100):
+                if not isinstance(obj, Walker):
+                    obj.rect.move_ip(self.rng.randrange(-300, 301), self.rng.randrange(-300, 301))
+                    obj.mark_dirty()
+            for view in views:
+                self.assertEqual(self.manager.get_visible_drawables(view), self.expected(view))
+
+    def test_removed_and_rectless_objects(self):
+        objects = self.add_objects(200, 4000)
+        for obj in objects[::3]:
+            obj.destroy_object()
+        objects[1].rect = None
+        objects[1].mark_dirty()
+        view = pygame.Rect(1000, 1000, 640, 480)
+        visible = self.manager.get_visible_drawables(view)
+        self.assertEqual(visible, self.expected(view))
+        self.assertIn(objects[1], visible)
+        objects[1].rect = pygame.Rect(-500, -500, 16, 16)
+        objects[1].mark_dirty()
+        self.assertNotIn(objects[1], self.manager.get_visible_drawables(view))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import heapq
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'roguepygame'))
+
+import numpy as np
+import pathfinding
+
+NEIGHBOURS = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1)]
+
+
+def reference_distances(costs: np.ndarray, goals: list[tuple[int, int]]) -> np.ndarray:
+    """
+    Plain heapq Dijkstra with 8 directions, the result the Dijkstra maps must match
+    :param costs: int array of shape (height, width), cost of entering every tile, 0 for walls
+    :param goals: (x, y) of the goals
+    :return: int array of shape (height, width), UNREACHABLE where no goal can be reached
+    """
+    height, width = costs.shape
+    distances = np.full(costs.shape, pathfinding.UNREACHABLE, dtype=np.int64)
+    queue = []
+    for x, y in goals:
+        if costs[y, x] > 0:
+            distances[y, x] = 0
+            queue.append((0, x, y))
+    while queue:
+        distance, x, y = heapq.heappop(queue)
+        if distance > distances[y, x]:
+            continue
+        for dx, dy in NEIGHBOURS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height and costs[ny, nx] > 0 \
+                    and distance + costs[ny, nx] < distances[ny, nx]:
+                distances[ny, nx] = distance + costs[ny, nx]
+                heapq.heappush(queue, (distances[ny, nx], nx, ny))
+    return distances
+
+
+class DijkstraMapTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.height, self.width = 40, 50
+        self.costs = np.where(self.rng.random((self.height, self.width)) < 0.25, 0,
+                              self.rng.integers(1, 4, (self.height, self.width)))
+        self.goals = [(3, 4), (45, 30)]
+        for x, y in self.goals:
+            self.costs[y, x] = 1
+        self.pathfinder = pathfinding.Pathfinder(self.costs)
+
+    def get_distances(self) -> np.ndarray:
+        dijkstra_map = self.pathfinder.get_map(self.goals)
+        return dijkstra_map.distances.reshape(self.height + 2, self.width + 2)[1:-1, 1:-1]
+
+    def assert_steps_go_down(self) -> None:
+        distances = self.get_distances()
+        positions = np.argwhere((distances > 0) & (distances < pathfinding.UNREACHABLE))[:, ::-1]
+        steps = self.pathfinder.next_steps(positions, self.goals)
+        for (x, y), (step_x, step_y) in zip(positions, steps):
+            self.assertEqual(max(abs(step_x - x), abs(step_y - y)), 1)
+            self.assertLess(distances[step_y, step_x], distances[y, x])
+
+    def test_distances_match_reference(self):
+        np.testing.assert_array_equal(self.get_distances(), reference_distances(self.costs, self.goals))
+        self.assert_steps_go_down()
+
+    def test_set_cost_keeps_maps_correct(self):
+        self.get_distances()
+        for _ in range(30):
+            x, y = int(self.rng.integers(self.width)), int(self.rng.integers(self.height))
+            cost = int(self.rng.integers(0, 4))
+            self.pathfinder.set_cost(x, y, cost)
+            self.costs[y, x] = cost
+            np.testing.assert_array_equal(self.get_distances(), reference_distances(self.costs, self.goals),
+                                          err_msg=f"after set_cost({x}, {y}, {cost})")
+            self.assert_steps_go_down()
+
+
+if __name__ == '__main__':
+    unittest.main()